@@ -13,12 +13,12 @@
 import { readFileSync, writeFileSync } from 'fs';
 
 // ── Load data directly (no bundler needed) ──
-const moviesRaw = readFileSync('E:/prince/Projects/random projects/movie suggester/frontend/src/data/movies.json', 'utf-8');
+const moviesRaw = readFileSync(new URL('./frontend/src/data/movies.json', import.meta.url), 'utf-8');
 const movieData = JSON.parse(moviesRaw);
 
 // ── Import taxonomy inline (ESM can't import CJS .js files easily) ──
 // We'll reconstruct what we need from the taxonomy file
-const taxonomyRaw = readFileSync('E:/prince/Projects/random projects/movie suggester/frontend/src/data/taxonomy.js', 'utf-8');
+const taxonomyRaw = readFileSync(new URL('./frontend/src/data/taxonomy.js', import.meta.url), 'utf-8');
 
 // Extract CAREER_SKILLS_TAXONOMY keys
 const INDUSTRIES = [
@@ -396,6 +396,16 @@ console.log(`Engine warmed with ${recommender.vocabulary.size} vocabulary featur
 const profiles = generateProfiles(700);
 console.log(`Generated ${profiles.length} test profiles.\n`);
 
+// `node audit_700_profiles.mjs --export-profiles <file>` writes the built
+// profiles as a fixture for the Python benchmarks and stops here.
+const exportAt = process.argv.indexOf('--export-profiles');
+if (exportAt !== -1) {
+  const exported = profiles.map(p => buildProfile(p.jobTitle, p.industry, p.careerStage, p.selectedSkills, p.vibe));
+  writeFileSync(process.argv[exportAt + 1], JSON.stringify(exported, null, 1), 'utf8');
+  console.log(`Exported ${exported.length} profiles to ${process.argv[exportAt + 1]}`);
+  process.exit(0);
+}
+
 let totalIssues = 0;
 let totalWarnings = 0;
 const issueLog = [];
@@ -527,5 +537,5 @@ const report = {
   sample_results: sampleResults,
 };
 
-writeFileSync('E:/prince/Projects/random projects/movie suggester/audit_report.json', JSON.stringify(report, null, 2));
+writeFileSync(new URL('./audit_report.json', import.meta.url), JSON.stringify(report, null, 2));
 console.log("\n✅ Full report saved to audit_report.json");
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import recommender
+from result_cache import profile_key
+
+# ──────────────────────────────────────────────
+# ASYNC SERVING FAÇADE
+# generate_recommendations is synchronous and CPU-bound; awaiting it from
+# an async handler would stall the event loop. AsyncRecommender warms
+# the catalog in the background, runs scoring on a bounded thread pool
+# (NumPy/SciPy release the GIL in the heavy parts; with SHARDS the work
+# moves to worker processes anyway), sheds load once too many distinct
+# requests are queued, and lets identical in-flight requests share one
+# computation. Use one instance per event loop, e.g. in a FastAPI app:
+#
+#     service = AsyncRecommender()
+#
+#     @asynccontextmanager
+#     async def lifespan(app):
+#         service.start()
+#         yield
+#         await service.close()
+#         recommender.close_shards()
+#
+# The shard workers belong to the process rather than to one instance, so
+# the app stops them itself. Map Overloaded to HTTP 503 (with Retry-After)
+# and readiness() to the readiness probe.
+# ──────────────────────────────────────────────
+
+# Scoring threads; each runs one recommendation call at a time
+ASYNC_WORKERS = int(os.environ.get("MOVIEFY_ASYNC_WORKERS", str(min(os.cpu_count() or 1, 8))))
+# Distinct computations admitted at once (running, queued for a thread or
+# waiting for the warm-up); more raise Overloaded instead of queueing
+ASYNC_MAX_PENDING = int(os.environ.get("MOVIEFY_ASYNC_MAX_PENDING", "64"))
+
+
+class Overloaded(RuntimeError):
+    """The scoring queue is full; the caller should retry later."""
+
+
+class NotReady(RuntimeError):
+    """Warming the catalog failed, so nothing can be scored."""
+
+
+def _warm():
+    """warm_cache(), failing if it left no catalog to serve."""
+    recommender.warm_cache()
+    if not recommender.catalog_available():
+        raise NotReady(f"no catalog to serve from {recommender.DB_PATH}")
+
+
+class AsyncRecommender:
+    """Awaitable generate_recommendations with background warm-up,
+    backpressure and in-flight request coalescing.
+
+    All bookkeeping happens on the event loop thread, so it needs no locks."""
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or ASYNC_WORKERS
+        self.max_pending = ASYNC_MAX_PENDING if max_pending is None else max_pending
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="moviefy-score")
+        self._warming = None
+        self._warm_started = None
+        self._inflight = {}
+        self.state = "cold"
+        self.error = None
+        self.warm_seconds = None
+        self.pending = 0
+        self.completed = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    # ── Warm-up & readiness ──
+
+    def start(self):
+        """Begin warming the catalog on a background thread and return at
+        once (call from the app's startup hook, inside the event loop).
+        After a failed warm-up, the next call tries again."""
+        if self._warming is None or self.state == "failed":
+            self.state = "warming"
+            self.error = None
+            self._warm_started = time.perf_counter()
+            self._warming = asyncio.get_running_loop().run_in_executor(None, _warm)
+            self._warming.add_done_callback(self._warmed)
+        return self._warming
+
+    def _warmed(self, future):
+        self.warm_seconds = time.perf_counter() - self._warm_started
+        if future.cancelled() or future.exception() is not None:
+            self.state = "failed"
+            self.error = "cancelled" if future.cancelled() else repr(future.exception())
+        else:
+            self.state = "ready"
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def readiness(self):
+        """State ("cold", "warming", "ready" or "failed") for a readiness probe."""
+        return {"state": self.state, "ready": self.ready, "error": self.error, "warm_seconds": self.warm_seconds}
+
+    async def wait_ready(self):
+        """Wait for the warm-up (starting or retrying it if needed); NotReady if it failed."""
+        await asyncio.shield(self.start())
+        if self.state == "failed":
+            raise NotReady(f"catalog warm-up failed: {self.error}")
+
+    # ── Scoring ──
+
+    async def recommend(self, profile_data: dict, top_n: int = 10, **options):
+        """generate_recommendations(profile_data, top_n, **options) off the event loop.
+
+        A request identical to one still in flight waits for that one's
+        result instead of scoring again. A new computation is refused with
+        Overloaded while max_pending others are admitted. Cancelling a
+        waiter does not cancel a computation other waiters share."""
+        key = profile_key(profile_data, top_n, variant=json.dumps(options, sort_keys=True, default=str))
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+        else:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded(f"{self.pending} recommendation requests already pending")
+            self.pending += 1
+            shared = asyncio.ensure_future(self._compute(key, partial(
+                recommender.generate_recommendations, profile_data, top_n, **options
+            )))
+            self._inflight[key] = shared
+        recommendations = await asyncio.shield(shared)
+        # Every waiter gets its own dicts, like result cache hits
+        return [dict(rec) for rec in recommendations]
+
+    async def _compute(self, key, call):
+        try:
+            await self.wait_ready()
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        """Queue depth and coalescing / load-shedding counters."""
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "in_flight": len(self._inflight),
+            "completed": self.completed,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+    async def close(self):
+        """Let running calls finish, then stop this instance's scoring threads.
+        Process-wide resources (shard workers, the catalog refresher) are
+        left to the app, see recommender.close_shards()."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self._inflight.clear()
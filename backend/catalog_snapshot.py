@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import threading
+from typing import Any, NamedTuple, Optional, Tuple
+
+# ──────────────────────────────────────────────
+# CATALOG SNAPSHOTS
+# Everything a request reads lives in one immutable CatalogSnapshot.
+# Rebuilds produce a new snapshot and publish it with a single reference
+# assignment, so a request that grabbed the old one keeps a consistent
+# view and readers never take a lock.
+# ──────────────────────────────────────────────
+
+
+class CatalogSnapshot(NamedTuple):
+    vectorizer: Any
+    tfidf_matrix: Any
+    engine: Any
+    key: str  # index artifact key (see _build_or_load), also scopes the result cache
+    token: Optional[Tuple]  # CatalogWatcher.token() observed before the table was read
+    source: str  # "fresh fit", "incremental update" or "index artifact"
+    tfidf: Any = None  # TfidfIndex behind vectorizer / tfidf_matrix, for incremental updates
+    lsa: Any = None  # LazyPart of LsaIndex per component count, for retrieval="lsa"
+    neighbors: Any = None  # LazyPart of NeighborTable per K, for similar_movies / diversity
+    content_hash: Optional[str] = None  # catalog content hash; equals key unless the index was patched
+
+
+class CatalogWatcher:
+    """Cheap change probe for a SQLite file.
+
+    Combines `PRAGMA data_version` on a long-lived connection (bumped by
+    every commit from another connection) with the file's stat, which also
+    catches the file being replaced wholesale. Equal tokens mean nothing
+    changed; a changed token may still be a no-op (e.g. VACUUM), which the
+    content hash sorts out."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def token(self):
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+                if self._conn is None or st.st_ino != self._inode:
+                    self._close()
+                    self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                    self._inode = st.st_ino
+                version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            except (OSError, sqlite3.Error):
+                self._close()
+                return None
+            return (st.st_ino, st.st_mtime_ns, st.st_size, version)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._inode = None
+
+
+class SnapshotRefresher:
+    """Daemon thread that calls `refresh()` whenever `is_stale()` says so,
+    every `interval` seconds, off the request path."""
+
+    def __init__(self, is_stale, refresh, interval):
+        self.is_stale = is_stale
+        self.refresh = refresh
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="catalog-refresher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.is_stale():
+                    self.refresh()
+            except Exception as e:
+                # Keep serving the current snapshot; the next tick retries
+                print(f"[Recommender ERROR] Catalog refresh failed: {e}")
@@ -0,0 +1,136 @@
+import re
+import sqlite3
+import threading
+
+# ──────────────────────────────────────────────
+# SQLITE FTS5 RETRIEVAL
+# Alternative to the in-memory TF-IDF engine for small instances: an
+# external-content FTS5 table over the indexed movie columns lives inside
+# movies.db itself, kept current by triggers. A query ranks the catalog
+# with bm25() and only the best FTS_CANDIDATES rows are read back, so the
+# process never holds the corpus, a DataFrame or a fitted vectorizer.
+# Needs only the standard library.
+# ──────────────────────────────────────────────
+
+FTS_TABLE = "movies_fts"
+FTS_COLUMNS = ("career_skills", "industry", "career_stage", "summary")
+# bm25() weight per FTS_COLUMNS entry
+FTS_COLUMN_WEIGHTS = (1.0, 1.0, 1.0, 1.0)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def match_expression(text):
+    """FTS5 MATCH string OR-ing every distinct word of `text`.
+
+    Words are quoted so FTS5 operators in user input are taken literally.
+    Repeats are dropped: bm25() would score each copy as its own phrase,
+    which costs a posting-list scan per copy and ranked worse in testing."""
+    return " OR ".join(dict.fromkeys(f'"{word}"' for word in _TOKEN.findall(text.lower())))
+
+
+class FtsIndex:
+    """bm25 search over the FTS5 table in one movies.db.
+
+    Each thread reads through its own connection (sqlite3 connections are
+    not shared across threads). `functions` maps names to Python callables
+    registered as SQL functions on every connection, for search conditions."""
+
+    # Columns read back for every candidate (the remaining signals and explanations)
+    ROW_COLUMNS = ("id", "title", "career_skills", "industry", "career_stage", "summary", "educational_value_score")
+
+    def __init__(self, path, functions=None):
+        self.path = path
+        self.functions = dict(functions or {})
+        self._local = threading.local()
+        weights = ", ".join(map(str, FTS_COLUMN_WEIGHTS))
+        self._search_sql = (
+            f"SELECT rowid, -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH ? ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT ?"
+        )
+        # Filtered searches join the movies row (as m) so the condition runs before the LIMIT
+        self._filtered_sql = (
+            f"SELECT {FTS_TABLE}.rowid, -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"JOIN movies AS m ON m.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH ? AND ({{where}}) ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT ?"
+        )
+        self._rows_sql = f"SELECT {', '.join(self.ROW_COLUMNS)} FROM movies WHERE id IN "
+
+    @classmethod
+    def open(cls, path, functions=None):
+        """Create or repair the FTS5 table in `path`, then return an index over it."""
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                if not cls._is_current(conn):
+                    cls._rebuild(conn)
+        finally:
+            conn.close()
+        return cls(path, functions)
+
+    @staticmethod
+    def _is_current(conn):
+        """The table and all three sync triggers exist and cover every movie.
+        A replaced movies table loses its triggers, so the check catches it."""
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE name LIKE ?", (FTS_TABLE + "%",))}
+        expected = {FTS_TABLE} | {f"{FTS_TABLE}_{op}" for op in ("ai", "ad", "au")}
+        if not expected <= names:
+            return False
+        indexed = conn.execute(f"SELECT count(*) FROM {FTS_TABLE}_docsize").fetchone()[0]
+        return indexed == conn.execute("SELECT count(*) FROM movies").fetchone()[0]
+
+    @staticmethod
+    def _rebuild(conn):
+        columns = ", ".join(FTS_COLUMNS)
+        new = ", ".join("new." + c for c in FTS_COLUMNS)
+        old = ", ".join("old." + c for c in FTS_COLUMNS)
+        delete = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+        insert = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new});"
+        for op in ("ai", "ad", "au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{op}")
+        conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        conn.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns}, content='movies', content_rowid='id')")
+        conn.execute(f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON movies BEGIN {insert} END")
+        conn.execute(f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON movies BEGIN {delete} END")
+        conn.execute(f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON movies BEGIN {delete} {insert} END")
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        print(f"[FTS] Built {FTS_TABLE} over {', '.join(FTS_COLUMNS)}")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            for name, fn in self.functions.items():
+                conn.create_function(name, -1, fn, deterministic=True)
+        return conn
+
+    def search(self, text, limit, where=None, params=()):
+        """(rows of ROW_COLUMNS, bm25 relevance per row), best match first.
+        Relevance is positive: FTS5's bm25() returns lower-is-better scores.
+
+        `where` is an optional SQL condition on the matching movies row,
+        aliased `m`, with `params` bound to its placeholders; only rows
+        passing it count towards `limit`."""
+        expression = match_expression(text)
+        if not expression:
+            return [], []
+        conn = self._connection()
+        if where:
+            sql = self._filtered_sql.format(where=where)
+            hits = conn.execute(sql, (expression, *params, limit)).fetchall()
+        else:
+            hits = conn.execute(self._search_sql, (expression, limit)).fetchall()
+        if not hits:
+            return [], []
+        # Ranking first and reading rows second keeps the sort off the wide
+        # joined rows; the primary-key lookups are then cheap
+        placeholders = ",".join("?" * len(hits))
+        by_id = {row[0]: row for row in conn.execute(self._rows_sql + f"({placeholders})", [h[0] for h in hits])}
+        hits = [h for h in hits if h[0] in by_id]
+        return [by_id[h[0]] for h in hits], [h[1] for h in hits]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,330 @@
+import contextlib
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+# ──────────────────────────────────────────────
+# ON-DISK INDEX ARTIFACT
+# One directory per index key (the catalog content hash, see _build_or_load):
+#   movies_index/<key>/meta.json      vocabulary + factorized column values
+#   movies_index/<key>/*.npy          CSR buffers, IDF weights, column arrays,
+#                                     signal tables, packed string columns
+# A key directory is written under a temp name and renamed into place, so a
+# reader only ever sees a complete artifact. Arrays load memory-mapped, so
+# every process attached to the same artifact shares one copy of its pages.
+# ──────────────────────────────────────────────
+
+INDEX_FORMAT_VERSION = 6
+
+# A build lock older than this is considered abandoned by a crashed builder
+BUILD_LOCK_TIMEOUT = 300
+
+
+class PackedStrings:
+    """Read-only sequence of str stored as one UTF-8 byte array plus offsets.
+
+    Both arrays can be memory-mapped; a value is decoded only when accessed,
+    so attaching to an index does not materialize the catalog's text."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @staticmethod
+    def pack(values):
+        encoded = [str(v).encode("utf-8", "surrogatepass") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return blob, offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            # A contiguous slice shares the blob; only the offsets are narrowed
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError("PackedStrings only supports contiguous slices")
+            return PackedStrings(self.blob, self.offsets[start:max(start, stop) + 1])
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8", "surrogatepass")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+_ARRAY_FILES = ("tfidf_data", "tfidf_indices", "tfidf_indptr", "idf")
+
+
+def index_dir(db_path):
+    """Artifact root stored next to the database file."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "movies_index")
+
+
+def save_index(root, key, vocabulary, idf, tfidf_matrix, columns, arrays, strings=None, replace=False):
+    """Persist a fitted index under root/key.
+
+    `columns` holds JSON-able metadata (stored in meta.json), `arrays` maps
+    extra names to NumPy arrays and `strings` maps names to string columns,
+    stored packed (see PackedStrings). An existing artifact for `key` is
+    kept unless `replace` is set."""
+    import scipy.sparse as sp
+
+    strings = strings or {}
+    final_dir = os.path.join(root, key)
+    if os.path.isdir(final_dir) and not replace:
+        return final_dir
+
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = os.path.join(root, f"{key}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    tfidf_matrix = sp.csr_matrix(tfidf_matrix)
+    buffers = {
+        "tfidf_data": tfidf_matrix.data,
+        "tfidf_indices": tfidf_matrix.indices,
+        "tfidf_indptr": tfidf_matrix.indptr,
+        "idf": np.asarray(idf),
+    }
+    buffers.update(arrays)
+    for name, values in strings.items():
+        buffers[name + "_blob"], buffers[name + "_offsets"] = PackedStrings.pack(values)
+    for name, arr in buffers.items():
+        np.save(os.path.join(tmp_dir, name + ".npy"), np.ascontiguousarray(arr))
+
+    terms = [None] * len(vocabulary)
+    for term, col in vocabulary.items():
+        terms[col] = term
+    meta = {
+        "format": INDEX_FORMAT_VERSION,
+        "key": key,
+        "shape": list(tfidf_matrix.shape),
+        "terms": terms,
+        "columns": columns,
+        "arrays": sorted(arrays),
+        "strings": sorted(strings),
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    if replace and os.path.isdir(final_dir):
+        # Processes attached to the old files keep their mappings
+        stale_dir = os.path.join(root, f"{key}.tmp-stale-{os.getpid()}")
+        try:
+            os.rename(final_dir, stale_dir)
+        except OSError:
+            pass
+        shutil.rmtree(stale_dir, ignore_errors=True)
+    try:
+        os.rename(tmp_dir, final_dir)
+    except OSError:
+        # Another process published the same key first; theirs is identical
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if replace:
+            # ...unless the old artifact could not be moved aside (Windows keeps mapped files locked)
+            raise
+        return final_dir
+
+    _prune(root, keep=key)
+    return final_dir
+
+
+def load_index(root, key):
+    """Load the artifact for `key`, or None if it is missing or unreadable."""
+    import scipy.sparse as sp
+
+    key_dir = os.path.join(root, key)
+    meta_path = os.path.join(key_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != INDEX_FORMAT_VERSION or meta.get("key") != key:
+            return None
+
+        def _load(name):
+            return np.load(os.path.join(key_dir, name + ".npy"), mmap_mode="r")
+
+        tfidf_matrix = sp.csr_matrix(
+            (_load("tfidf_data"), _load("tfidf_indices"), _load("tfidf_indptr")),
+            shape=tuple(meta["shape"]),
+            copy=False,
+        )
+        return {
+            "vocabulary": {term: col for col, term in enumerate(meta["terms"])},
+            "idf": np.array(_load("idf")),
+            "tfidf_matrix": tfidf_matrix,
+            "columns": meta["columns"],
+            "arrays": {name: _load(name) for name in meta["arrays"]},
+            "strings": {
+                name: PackedStrings(_load(name + "_blob"), _load(name + "_offsets"))
+                for name in meta.get("strings", [])
+            },
+        }
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[Recommender] Ignoring unreadable index artifact {key_dir}: {e}")
+        return None
+
+
+def save_extra(root, key, name, arrays):
+    """Add an optional, separately built part (e.g. the LSA embedding) to an
+    existing artifact as root/key/name/*.npy, published by rename."""
+    key_dir = os.path.join(root, key)
+    final_dir = os.path.join(key_dir, name)
+    if os.path.isdir(final_dir):
+        return final_dir
+    if not os.path.isdir(key_dir):
+        raise FileNotFoundError(f"no index artifact at {key_dir}")
+    tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for array_name, arr in arrays.items():
+        np.save(os.path.join(tmp_dir, array_name + ".npy"), np.ascontiguousarray(arr))
+    try:
+        os.rename(tmp_dir, final_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return final_dir
+
+
+def load_extra(root, key, name):
+    """Memory-mapped arrays of an extra part, or None if it was never built."""
+    extra_dir = os.path.join(root, key, name)
+    if not os.path.isdir(extra_dir):
+        return None
+    try:
+        return {
+            entry[:-4]: np.load(os.path.join(extra_dir, entry), mmap_mode="r")
+            for entry in os.listdir(extra_dir) if entry.endswith(".npy")
+        }
+    except (OSError, ValueError) as e:
+        print(f"[Recommender] Ignoring unreadable index part {extra_dir}: {e}")
+        return None
+
+
+class LazyPart:
+    """Extra parts of one index (see save_extra), loaded or built on first use.
+
+    `load(param)` returns a persisted part or None; `build(param)` builds
+    one and should persist it. Each runs at most once per param, under a
+    lock, so concurrent first requests share one build."""
+
+    def __init__(self, load, build):
+        self._load = load
+        self._build = build
+        self._parts = {}
+        self._lock = threading.Lock()
+
+    def get(self, param):
+        part = self._parts.get(param)
+        if part is None:
+            with self._lock:
+                part = self._parts.get(param)
+                if part is None:
+                    part = self._load(param) or self._build(param)
+                    self._parts[param] = part
+        return part
+
+    def peek(self, param):
+        """The part if it is loaded or persisted, else None; never builds it."""
+        part = self._parts.get(param)
+        if part is None:
+            with self._lock:
+                part = self._parts.get(param)
+                if part is None:
+                    part = self._load(param)
+                    if part is not None:
+                        self._parts[param] = part
+        return part
+
+
+def _prune(root, keep):
+    """Remove artifacts left behind by previous catalog versions."""
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name != keep and ".tmp-" not in name and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def build_lock(root, timeout=BUILD_LOCK_TIMEOUT):
+    """Cross-process lock so only one process fits and publishes the index.
+
+    Uses an O_EXCL lock file (works on Windows and POSIX). Waiters poll
+    until the holder releases it; a lock older than `timeout` seconds is
+    taken over. If the directory is not writable the caller proceeds
+    unlocked, since it could not publish an artifact anyway."""
+    path = os.path.join(root, ".build.lock")
+    try:
+        os.makedirs(root, exist_ok=True)
+    except OSError:
+        yield
+        return
+    fd = None
+    while fd is None:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > timeout:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            time.sleep(0.1)
+        except OSError:
+            break
+    try:
+        if fd is not None:
+            os.write(fd, str(os.getpid()).encode())
+        yield
+    finally:
+        if fd is not None:
+            os.close(fd)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def is_mapped(arr):
+    """True if `arr` is a view onto a memory-mapped file (shared between processes)."""
+    while isinstance(arr, np.ndarray):
+        if isinstance(arr, np.memmap):
+            return True
+        arr = arr.base
+    return isinstance(arr, mmap.mmap)
+
+
+def memory_breakdown(arrays):
+    """(shared bytes, private bytes) of the given NumPy arrays."""
+    shared = private = 0
+    for arr in arrays:
+        if is_mapped(arr):
+            shared += arr.nbytes
+        else:
+            private += arr.nbytes
+    return shared, private
+
+
+def process_rss():
+    """Resident set size of this process in bytes, or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
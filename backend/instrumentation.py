@@ -0,0 +1,165 @@
+import bisect
+import math
+import threading
+import time
+
+# ──────────────────────────────────────────────
+# HOT-PATH INSTRUMENTATION
+# Cumulative per-stage latency histograms plus a few gauges. A request
+# takes one StageTimer and marks each stage as it finishes; when metrics
+# are disabled it gets NULL_TIMER, whose methods do nothing, so the
+# instrumented code path costs a handful of no-op calls.
+# ──────────────────────────────────────────────
+
+# Bucket upper bounds in seconds: 1µs to ~100s, sqrt(2) apart, so a
+# percentile read from the buckets is within ~20% of the true value.
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** (i / 2) for i in range(54))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (count, total, bucket counts)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.total
+
+    @staticmethod
+    def quantile(counts, count, q):
+        """Estimate the q-quantile, interpolating geometrically inside its bucket."""
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                upper = BUCKET_BOUNDS[min(i, len(BUCKET_BOUNDS) - 1)]
+                lower = BUCKET_BOUNDS[i - 1] if i else upper / math.sqrt(2)
+                return lower * (upper / lower) ** ((rank - seen) / n)
+            seen += n
+        return BUCKET_BOUNDS[-1]
+
+
+class StageTimer:
+    """Times consecutive stages of one call: mark(stage) records the time
+    since the previous mark (or since the timer was created)."""
+
+    __slots__ = ("_stats", "_prefix", "_start", "_last")
+
+    def __init__(self, stats, prefix):
+        self._stats = stats
+        self._prefix = prefix
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self._stats.observe(self._prefix + stage, now - self._last)
+        self._last = now
+
+    def done(self, stage="total"):
+        """Record the whole call, from creation until now."""
+        now = time.perf_counter()
+        self._stats.observe(self._prefix + stage, now - self._start)
+        self._last = now
+        return now - self._start
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+    def done(self, stage="total"):
+        return 0.0
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Stats:
+    """Registry of stage histograms and gauges."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def timer(self, prefix=""):
+        if not self.enabled:
+            return NULL_TIMER
+        return StageTimer(self, prefix)
+
+    def observe(self, name, seconds):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        histogram.observe(seconds)
+
+    def set_gauge(self, name, value):
+        if self.enabled:
+            self._gauges[name] = value
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._gauges = {}
+
+    def get_stats(self):
+        """{"enabled", "stages": {name: count/total/mean/p50/p99}, "gauges"}."""
+        stages = {}
+        for name, histogram in sorted(self._histograms.items()):
+            counts, count, total = histogram.snapshot()
+            stages[name] = {
+                "count": count,
+                "total_s": total,
+                "mean_ms": total / count * 1000.0 if count else 0.0,
+                "p50_ms": Histogram.quantile(counts, count, 0.50) * 1000.0,
+                "p99_ms": Histogram.quantile(counts, count, 0.99) * 1000.0,
+            }
+        return {"enabled": self.enabled, "stages": stages, "gauges": dict(self._gauges)}
+
+    def to_prometheus(self, namespace="moviefy", extra_gauges=None, extra_counters=None):
+        """Prometheus text exposition (format 0.0.4) of every histogram and
+        gauge, plus `extra_counters` (monotonic totals, exported as *_total)."""
+        metric = f"{namespace}_stage_duration_seconds"
+        lines = [
+            f"# HELP {metric} Time spent in each recommender stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, histogram in sorted(self._histograms.items()):
+            counts, count, total = histogram.snapshot()
+            cumulative = 0
+            for bound, n in zip(BUCKET_BOUNDS, counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {total:.9g}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+        gauges = dict(self._gauges)
+        gauges.update(extra_gauges or {})
+        for name, value in sorted(gauges.items()):
+            if value is None:
+                continue
+            lines.append(f"# TYPE {namespace}_{name} gauge")
+            lines.append(f"{namespace}_{name} {float(value):.9g}")
+        for name, value in sorted((extra_counters or {}).items()):
+            if value is None:
+                continue
+            lines.append(f"# TYPE {namespace}_{name}_total counter")
+            lines.append(f"{namespace}_{name}_total {float(value):.9g}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,64 @@
+import numpy as np
+
+# ──────────────────────────────────────────────
+# DENSE LSA RETRIEVAL
+# Optional alternative to the exact sparse cosine: the TF-IDF matrix is
+# projected once onto its top singular vectors (TruncatedSVD) and every
+# movie becomes a unit-length float32 vector of a few hundred dims.
+# A query is projected the same way, so its content scores for the whole
+# catalog are one BLAS matrix-vector product.
+# ──────────────────────────────────────────────
+
+LSA_COMPONENTS = 256
+
+
+class LsaIndex:
+    """Row-normalized float32 document embeddings plus the projection.
+
+    `projection` is (n_features x k), C-contiguous, so projecting a sparse
+    query only touches the rows of its non-zero terms."""
+
+    def __init__(self, projection, embeddings):
+        self.projection = projection
+        self.embeddings = embeddings
+
+    @classmethod
+    def fit(cls, tfidf_matrix, n_components=LSA_COMPONENTS, random_state=0):
+        from sklearn.decomposition import TruncatedSVD
+
+        n_components = max(1, min(n_components, min(tfidf_matrix.shape) - 1))
+        svd = TruncatedSVD(n_components, algorithm="randomized", n_iter=5, random_state=random_state)
+        svd.fit(tfidf_matrix)
+        projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        return cls(projection, cls._unit_rows(tfidf_matrix @ projection))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["projection"], arrays["embeddings"])
+
+    def to_arrays(self):
+        return {"projection": self.projection, "embeddings": self.embeddings}
+
+    @property
+    def n_components(self):
+        return self.projection.shape[1]
+
+    def project(self, query_matrix):
+        """Unit-length embeddings of TF-IDF query rows (all-zero rows stay zero)."""
+        return self._unit_rows(query_matrix @ self.projection)
+
+    def scores(self, query_matrix):
+        """(queries x movies) content scores in [0, 1]."""
+        scores = self.project(query_matrix) @ self.embeddings.T
+        # Anti-correlated directions carry no relevance; keep the sparse
+        # signal's [0, 1] range
+        np.maximum(scores, 0.0, out=scores)
+        return scores
+
+    @staticmethod
+    def _unit_rows(dense):
+        dense = np.asarray(dense, dtype=np.float32)
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        return dense / norms
+
@@ -0,0 +1,94 @@
+import numpy as np
+
+# ──────────────────────────────────────────────
+# ITEM-TO-ITEM NEIGHBOR TABLE
+# Each movie's NEIGHBOR_K most similar titles by TF-IDF cosine, computed
+# once per index in row blocks (a block is NEIGHBOR_BLOCK x catalog
+# floats, never the full catalog x catalog matrix) and stored with the
+# index artifact. "More like this" and diversity re-ranking read it in
+# O(K) per movie instead of scoring pairs per request.
+# ──────────────────────────────────────────────
+
+NEIGHBOR_K = 50
+NEIGHBOR_BLOCK = 512
+
+
+class NeighborTable:
+    """(movies x K) neighbor positions (int32) and cosine scores (float32),
+    best first, ties by position. Slots past the movie's last neighbor
+    with a non-zero similarity hold position -1 and score 0."""
+
+    def __init__(self, rows, scores):
+        self.rows = rows
+        self.scores = scores
+
+    @classmethod
+    def build(cls, tfidf_matrix, k=NEIGHBOR_K, block_size=NEIGHBOR_BLOCK):
+        """Top-k cosine neighbors of every row of an L2-normalized matrix."""
+        n = tfidf_matrix.shape[0]
+        k = max(0, min(k, n - 1))
+        rows = np.full((n, k), -1, dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float32)
+        transposed = tfidf_matrix.T.tocsc()
+        for start in range(0, n, block_size):
+            end = min(start + block_size, n)
+            block = (tfidf_matrix[start:end] @ transposed).toarray()
+            # A movie is not its own neighbor
+            block[np.arange(end - start), np.arange(start, end)] = -1.0
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k] if 0 < k < n else np.argsort(-block, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.lexsort((top, -top_scores), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            found = top_scores > 0
+            rows[start:end] = np.where(found, top, -1)
+            scores[start:end] = np.where(found, top_scores, 0.0)
+        return cls(rows, scores)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["neighbor_rows"], arrays["neighbor_scores"])
+
+    def to_arrays(self):
+        return {"neighbor_rows": self.rows, "neighbor_scores": self.scores}
+
+    @property
+    def k(self):
+        return self.rows.shape[1]
+
+    def neighbors(self, pos, k):
+        """(positions, scores) of up to k neighbors of the movie at `pos`."""
+        rows = self.rows[pos, :k]
+        found = rows >= 0
+        return rows[found], self.scores[pos, :k][found]
+
+    def diversify(self, positions, scores, top_n, diversity):
+        """Greedy maximal-marginal-relevance pick of top_n from ranked
+        candidates: each step takes the best `score - diversity * 100 *
+        max similarity to an already picked movie`, with similarities read
+        from the table in either direction (0 if neither lists the other).
+        Returns indices into `positions`, in pick order."""
+        positions = np.asarray(positions)
+        relevance = np.asarray(scores, dtype=np.float64)
+        if diversity <= 0 or len(positions) <= 1:
+            return np.arange(min(top_n, len(positions)))
+        candidate_rows = self.rows[positions]
+        candidate_scores = self.scores[positions]
+        penalty = np.zeros(len(positions))
+        available = np.ones(len(positions), dtype=bool)
+        picked = []
+        for _ in range(min(top_n, len(positions))):
+            gain = np.where(available, relevance - diversity * 100.0 * penalty, -np.inf)
+            i = int(np.argmax(gain))
+            picked.append(i)
+            available[i] = False
+            # Candidates the picked movie lists as neighbors ...
+            listed = np.isin(positions, self.rows[positions[i]])
+            if listed.any():
+                lookup = dict(zip(self.rows[positions[i]].tolist(), self.scores[positions[i]].tolist()))
+                similarity = np.array([lookup.get(int(p), 0.0) for p in positions[listed]])
+                penalty[listed] = np.maximum(penalty[listed], similarity)
+            # ... and candidates that list the picked movie
+            mentions = candidate_rows == positions[i]
+            penalty = np.maximum(penalty, np.where(mentions, candidate_scores, 0.0).max(axis=1))
+        return np.array(picked, dtype=np.int64)
@@ -0,0 +1,183 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+# ──────────────────────────────────────────────
+# LIGHTWEIGHT QUERY ENCODER
+# A fitted TfidfVectorizer is only needed at serving time to turn one
+# short query into a sparse row. QueryEncoder does the same from the
+# persisted vocabulary, IDF and stop word list, without importing
+# scikit-learn. The arithmetic follows TfidfVectorizer.transform step for
+# step, so the rows it returns are bit-identical.
+# ──────────────────────────────────────────────
+
+# TfidfVectorizer parameters the encoder reproduces; anything else only
+# shapes the fit (max_features, min_df, max_df) or is rejected
+SUPPORTED_PARAMS = {"stop_words", "max_features", "ngram_range", "min_df", "max_df", "sublinear_tf", "lowercase", "token_pattern"}
+
+# Query parts (a skill, an industry, ...) whose term counts are memoized
+PART_CACHE_SIZE = 8192
+
+
+class QueryEncoder:
+    """TfidfVectorizer.transform for a fitted vocabulary, scikit-learn free.
+
+    `stop_words` is the vectorizer's resolved list (get_stop_words()), not
+    the name "english", since the encoder cannot look names up."""
+
+    def __init__(self, vocabulary, idf, stop_words=(), ngram_range=(1, 1), sublinear_tf=False,
+                 lowercase=True, token_pattern=r"(?u)\b\w\w+\b"):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.stop_words = frozenset(stop_words)
+        self.ngram_range = tuple(ngram_range)
+        self.sublinear_tf = sublinear_tf
+        self.lowercase = lowercase
+        self._token_re = re.compile(token_pattern)
+        self._part = lru_cache(maxsize=PART_CACHE_SIZE)(self._part_columns)
+
+    @classmethod
+    def from_params(cls, params, vocabulary, idf, stop_words):
+        """Encoder for a TfidfVectorizer(**params) fit with this vocabulary and IDF."""
+        unsupported = set(params) - SUPPORTED_PARAMS
+        if unsupported:
+            raise ValueError(f"QueryEncoder cannot reproduce TfidfVectorizer params {sorted(unsupported)}")
+        kwargs = {name: params[name] for name in ("ngram_range", "sublinear_tf", "lowercase", "token_pattern") if name in params}
+        return cls(vocabulary, idf, stop_words, **kwargs)
+
+    def tokens(self, text):
+        """Words of `text` left after lowercasing and stop word removal."""
+        if self.lowercase:
+            text = text.lower()
+        return [w for w in self._token_re.findall(text) if w not in self.stop_words]
+
+    def analyze(self, text):
+        """Same tokens as the vectorizer's build_analyzer(), in the same order."""
+        return self._grams(self.tokens(text))
+
+    def _grams(self, tokens):
+        min_n, max_n = self.ngram_range
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n + 1, len(tokens) + 1)):
+            for i in range(len(tokens) - n + 1):
+                grams.append(" ".join(tokens[i:i + n]))
+        return grams
+
+    def _columns(self, grams):
+        vocabulary = self.vocabulary
+        return [col for col in map(vocabulary.get, grams) if col is not None]
+
+    def _part_columns(self, text):
+        """(vocabulary columns of its terms, with repeats; word count; first and
+        last max_n - 1 words) of one query part."""
+        tokens = self.tokens(text)
+        edge = self.ngram_range[1] - 1
+        head, tail = (tuple(tokens[:edge]), tuple(tokens[-edge:])) if edge else ((), ())
+        return tuple(self._columns(self._grams(tokens))), len(tokens), head, tail
+
+    def encode(self, text):
+        """(sorted column indices, weights) of one text's TF-IDF row, L2-normalized."""
+        return self._weigh(Counter(self._columns(self.analyze(text))))
+
+    def encode_parts(self, parts):
+        """encode(" ".join(parts)), bit for bit, from memoized per-part terms.
+
+        Words never span the joining spaces, so the joined text's terms are
+        each part's own terms plus the n-grams crossing a boundary, which
+        are rebuilt from the words at the parts' edges."""
+        min_n, max_n = self.ngram_range
+        edge = max_n - 1
+        vocabulary = self.vocabulary
+        columns = []
+        tail = ()
+        for part in parts:
+            part_columns, words, head, part_tail = self._part(part)
+            if not words:
+                continue
+            columns.extend(part_columns)
+            if tail:
+                if edge == 1 and min_n <= 2:
+                    col = vocabulary.get(tail[0] + " " + head[0])
+                    if col is not None:
+                        columns.append(col)
+                else:
+                    window = tail + head
+                    columns.extend(self._columns(
+                        " ".join(window[i:i + n])
+                        for n in range(max(min_n, 2), max_n + 1)
+                        for i in range(len(tail))
+                        if len(tail) < i + n <= len(window)
+                    ))
+            if edge:
+                tail = (tail + part_tail)[-edge:]
+        return self._weigh(Counter(columns))
+
+    def encode_weighted(self, fields):
+        """TF-IDF row of (text, weight) pairs, each text analyzed on its own
+        and its term counts scaled by the weight (no n-grams across texts)."""
+        counts = {}
+        for text, weight in fields:
+            if not weight:
+                continue
+            for col in self._part(text)[0]:
+                counts[col] = counts.get(col, 0) + weight
+        return self._weigh(counts)
+
+    def _weigh(self, counts):
+        """Sorted (indices, L2-normalized TF-IDF weights) of term counts by column."""
+        indices = np.array(sorted(counts), dtype=np.int32)
+        data = np.array([counts[c] for c in indices.tolist()], dtype=np.float64)
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1.0
+        data *= self.idf[indices]
+        return indices, unit_row(data)
+
+    def transform(self, texts):
+        """(len(texts) x n_features) CSR matrix, like vectorizer.transform(texts)."""
+        return self.matrix([self.encode(text) for text in texts])
+
+    def matrix(self, rows):
+        """CSR matrix stacking (indices, data) rows from the encode methods."""
+        return rows_matrix(rows, len(self.idf))
+
+
+def rows_matrix(rows, n_features):
+    """(len(rows) x n_features) CSR matrix of (indices, data) rows."""
+    import scipy.sparse as sp
+
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(indices) for indices, _ in rows])
+    indices = np.concatenate([r[0] for r in rows]) if rows else np.zeros(0, dtype=np.int32)
+    data = np.concatenate([r[1] for r in rows]) if rows else np.zeros(0)
+    return sp.csr_matrix((data, indices, indptr), shape=(len(rows), n_features))
+
+
+def unit_row(data):
+    """`data` divided by its L2 norm, summed left to right in double
+    precision like sklearn's normalize() on CSR rows (all-zero rows stay
+    zero). A NumPy reduction would sum pairwise and round differently."""
+    total = 0.0
+    for value in data.tolist():
+        total += value * value
+    if total == 0.0:
+        return data
+    return data / math.sqrt(total)
+
+
+def sparse_cosine(rows, unit_matrix):
+    """cosine_similarity(queries, tfidf_matrix) as a dense array, where
+    `rows` are the queries' (indices, data) from the encode methods and
+    `unit_matrix` is normalize(tfidf_matrix): the query rows are
+    renormalized the same way and multiplied in the same term order, so
+    the scores match bit for bit. A single query skips the sparse matrix."""
+    rows = [(indices, unit_row(data)) for indices, data in rows]
+    if len(rows) == 1:
+        indices, data = rows[0]
+        dense = np.zeros(unit_matrix.shape[1])
+        dense[indices] = data
+        return (unit_matrix @ dense)[np.newaxis, :]
+    return (unit_matrix @ rows_matrix(rows, unit_matrix.shape[1]).T).toarray().T
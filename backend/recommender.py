@@ -1,78 +1,549 @@
 import sqlite3
 import os
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import threading
 import hashlib
+import json
+from functools import lru_cache, partial
+import index_store
+from instrumentation import NULL_TIMER, Stats
+from catalog_snapshot import CatalogSnapshot, CatalogWatcher, SnapshotRefresher
+from fts_index import FtsIndex
+from lsa_index import LSA_COMPONENTS, LsaIndex
+from neighbors import NEIGHBOR_K, NeighborTable
+from query_encoder import QueryEncoder, sparse_cosine
+from result_cache import ResultCache, profile_key
+from sharded_engine import ShardPool, shard_bounds
+from scoring_engine import (
+    DisplayColumns, LazyRanking, ScoringEngine, TextColumn, mentions_series, top_k,
+    W_COSINE, W_INDUSTRY, W_VIBE, W_SKILL_DEPTH, W_STAGE, W_EDU,
+)
 
 # ──────────────────────────────────────────────
 # CACHED TF-IDF ENGINE (Singleton)
-# Computes once per cold start, reuses on every request
+# Computes once per cold start, reuses on every request. The current
+# CatalogSnapshot is swapped atomically when movies.db changes; requests
+# read the `_snapshot` reference once and never lock.
+# scikit-learn is imported only to fit or patch the index, and SciPy only
+# by the sparse path: a worker attached to an index artifact serves without
+# scikit-learn, and one serving retrieval="fts5" without either. pandas is
+# not used at all; the table is read with sqlite3 straight into arrays.
 # ──────────────────────────────────────────────
 _cache_lock = threading.Lock()
-_cached_df = None
-_cached_vectorizer = None
-_cached_tfidf_matrix = None
+_snapshot = None
+_watcher = None
+_refresher = None
+_fts = None  # (watcher token, FtsIndex) for retrieval="fts5"
+
+# Seconds between movies.db change checks; None disables hot reloading.
+CATALOG_REFRESH_INTERVAL = 30.0
+
+# Catalog changes patch the TF-IDF index in place of a refit until the
+# tokens its vocabulary cannot represent exceed this share of the corpus.
+REFIT_DRIFT_THRESHOLD = 0.02
+
+# Per-stage latency histograms and warm-up gauges, see get_stats().
+# Disabling leaves only no-op timer calls on the hot path.
+METRICS_ENABLED = os.environ.get("MOVIEFY_METRICS", "1") != "0"
+_stats = Stats(enabled=METRICS_ENABLED)
+
+# Bounded LRU of finished recommendation lists, cleared on every rebuild.
+# Tune at runtime with configure_result_cache().
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = None  # seconds; None keeps entries until evicted or invalidated
+_result_cache = ResultCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
 
 # Resolve movies.db path relative to this file
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "movies.db")
 
-def _load_and_cache():
-    """Load the movie database and pre-compute the TF-IDF matrix once."""
-    global _cached_df, _cached_vectorizer, _cached_tfidf_matrix
+# The movies columns the index and the signals read (also what the content hash covers)
+CATALOG_COLUMNS = ["id", "title", "career_skills", "industry", "career_stage", "summary", "educational_value_score"]
+
+TFIDF_PARAMS = {
+    "stop_words": "english",
+    "max_features": 10000,
+    "ngram_range": (1, 2),
+    "min_df": 1,
+    "sublinear_tf": True,
+}
+
+
+def _catalog_hash(columns, rows):
+    """Content hash of the movies table plus everything that shapes the index.
+    Any edit to a row, the TF-IDF settings or the sklearn version yields a new key."""
+    h = hashlib.sha256()
+    h.update(json.dumps([index_store.INDEX_FORMAT_VERSION, _sklearn_version(), repr(TFIDF_PARAMS), VIBE_GENRES, columns]).encode())
+    for row in rows:
+        h.update("\x1f".join(map(str, row)).encode("utf-8", "surrogatepass"))
+        h.update(b"\x1e")
+    return h.hexdigest()[:32]
+
+
+def _sklearn_version():
+    """Installed scikit-learn version, read from package metadata so the
+    hash does not import scikit-learn itself."""
+    from importlib import metadata
     
+    try:
+        return metadata.version("scikit-learn")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+# ── Signal 4 genre keywords per vibe ──
+VIBE_GENRES = {
+    "Strategic Visionary": ["sci-fi", "biography", "epic", "future", "visionary", "pioneer", "revolution", "empire"],
+    "Analytical Stoic": ["mystery", "thriller", "documentary", "technical", "logic", "investigation", "puzzle", "heist"],
+    "Creative Free-Spirit": ["animation", "fantasy", "art", "music", "musical", "indie", "experimental", "surreal"],
+    "The Relentless Hustler": ["crime", "drama", "action", "competition", "business", "wall street", "hustle", "rise"],
+    "Empathic Leader": ["romance", "family", "social", "community", "leadership", "mentor", "sacrifice", "unity"],
+    "Pragmatic Builder": ["war", "adventure", "construction", "survival", "endurance", "engineering", "mission"],
+}
+
+# Values the resume parser can emit (INDUSTRY_KEYWORDS and SENIORITY in
+# frontend/src/data/taxonomy.js); their signal vectors are built at warm time.
+KNOWN_INDUSTRIES = [
+    "Technology", "Healthcare", "Finance", "Law", "Education",
+    "Media & Entertainment", "Engineering", "Retail & E-Commerce",
+    "Sports & Fitness", "Arts & Design", "Real Estate",
+    "Agriculture & Food", "Energy & Utilities", "Transportation & Logistics",
+    "Non-Profit & Social Impact", "Consulting", "Hospitality & Tourism",
+    "General",
+]
+KNOWN_CAREER_STAGES = ["Entry-level", "Mid-Level", "Senior"]
+
+
+def _read_catalog():
+    """(columns, rows) of the movies table, or None if it cannot be read."""
     try:
         if not os.path.exists(DB_PATH):
             print(f"[Recommender ERROR] movies.db not found at {DB_PATH}")
-            return
+            return None
         
         conn = sqlite3.connect(DB_PATH)
-        df = pd.read_sql_query("SELECT * FROM movies", conn)
+        cursor = conn.execute(f"SELECT {', '.join(CATALOG_COLUMNS)} FROM movies")
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
         conn.close()
     except Exception as e:
         print(f"[Recommender ERROR] Failed to load movies.db: {e}")
-        return
-    
-    if df.empty:
-        return
+        return None
+    return columns, rows
+
+
+def _catalog_docs(columns, rows):
+    """Movie ids plus the text each movie is indexed by."""
+    position = {name: i for i, name in enumerate(columns)}
+    ids = np.array([row[position["id"]] for row in rows], dtype=np.int64)
     
     # Combine all movie features into a single rich text for vectorization
-    df["combined_features"] = (
-        df["career_skills"].fillna("") + " " +
-        df["industry"].fillna("") + " " +
-        df["career_stage"].fillna("") + " " +
-        df["summary"].fillna("")
+    fields = [position[name] for name in ("career_skills", "industry", "career_stage", "summary")]
+    docs = [" ".join("" if row[i] is None else row[i] for i in fields) for row in rows]
+    return ids, docs
+
+
+def _fit_index(columns, rows, previous=None):
+    """TF-IDF index and signal engine for the raw table.
+
+    With a `previous` TfidfIndex, only new or edited movies are analyzed
+    against its vocabulary; a full refit happens once the vocabulary drift
+    passes REFIT_DRIFT_THRESHOLD."""
+    from tfidf_index import TfidfIndex
+    
+    ids, docs = _catalog_docs(columns, rows)
+    
+    tfidf = None
+    source = "fresh fit"
+    if previous is not None:
+        tfidf = previous.sync(ids, docs)
+        source = "incremental update"
+        if tfidf.drift > REFIT_DRIFT_THRESHOLD:
+            print(f"[Recommender] Vocabulary drift {tfidf.drift:.1%} over threshold, refitting")
+            tfidf = None
+            source = "fresh fit"
+    if tfidf is None:
+        # Pre-compute the TF-IDF matrix
+        tfidf = TfidfIndex.fit(TFIDF_PARAMS, ids, docs)
+    
+    # Pre-lowercased columns and per-category tables for the non-TF-IDF signals
+    engine = ScoringEngine.from_records(columns, rows)
+    engine.precompute_tables(VIBE_GENRES, KNOWN_INDUSTRIES, KNOWN_CAREER_STAGES)
+    return tfidf, engine, source
+
+
+def _snapshot_of(tfidf, engine, key, content_hash, source):
+    encoder = QueryEncoder.from_params(TFIDF_PARAMS, tfidf.vocabulary, tfidf.idf, tfidf.stop_words())
+    tfidf.cosine_matrix()
+    return CatalogSnapshot(
+        encoder, tfidf.matrix, engine, key, None, source, tfidf,
+        lsa=_lazy_part(key, "lsa", LsaIndex, lambda k: LsaIndex.fit(tfidf.matrix, k)),
+        neighbors=_lazy_part(key, "neighbors", NeighborTable, lambda k: NeighborTable.build(tfidf.matrix, k)),
+        content_hash=content_hash,
     )
+
+
+def _lazy_part(key, name, cls, build):
+    """Optional index parts (LSA embeddings, neighbor tables) stored next
+    to the index as "<name>-<param>" the first time any process needs them."""
+    root = index_store.index_dir(DB_PATH)
     
-    # Pre-compute the TF-IDF matrix
-    vectorizer = TfidfVectorizer(
-        stop_words='english',
-        max_features=10000,
-        ngram_range=(1, 2),
-        min_df=1,
-        sublinear_tf=True,
+    def load(param):
+        arrays = index_store.load_extra(root, key, f"{name}-{param}")
+        return cls.from_arrays(arrays) if arrays is not None else None
+    
+    def fit(param):
+        with index_store.build_lock(root):
+            part = load(param)
+            if part is not None:
+                return part
+            part = build(param)
+            try:
+                index_store.save_extra(root, key, f"{name}-{param}", part.to_arrays())
+            except OSError as e:
+                print(f"[Recommender] Could not persist {name}-{param}: {e}")
+                return part
+        print(f"[Recommender] Built {name}-{param}")
+        return load(param) or part
+    
+    return index_store.LazyPart(load, fit)
+
+
+def _attach_index(index, key, content_hash, source):
+    """Snapshot over a loaded index artifact.
+
+    Every array stays memory-mapped, so all worker processes attached to
+    the same artifact share one physical copy of it."""
+    tfidf, engine = _index_parts(index)
+    engine.precompute_tables(VIBE_GENRES, KNOWN_INDUSTRIES, KNOWN_CAREER_STAGES)
+    return _snapshot_of(tfidf, engine, key, content_hash, source)
+
+
+def _index_parts(index):
+    """(TfidfIndex, ScoringEngine) over a loaded index artifact."""
+    from tfidf_index import TfidfIndex
+    
+    columns, arrays, strings = index["columns"], index["arrays"], index["strings"]
+    tfidf = TfidfIndex.from_arrays(
+        TFIDF_PARAMS, index["vocabulary"], columns["tfidf_state"], arrays, index["idf"], index["tfidf_matrix"]
+    )
+    engine = ScoringEngine.from_arrays(
+        columns,
+        arrays,
+        TextColumn(strings["vibe_text"]),
+        DisplayColumns(arrays["ids"], *(strings[name] for name in DisplayColumns.FIELDS)),
     )
-    tfidf_matrix = vectorizer.fit_transform(df["combined_features"])
+    return tfidf, engine
+
+
+def _patched_key(content_hash, previous_key):
+    """Artifact key of an index patched from the one published as `previous_key`.
+
+    A patched index keeps the vocabulary of its last full fit, so its
+    rankings differ from a fresh fit of the same table; it must never be
+    published under (or served for) the table's plain content hash."""
+    lineage = hashlib.sha256(f"patched from {previous_key}".encode()).hexdigest()[:16]
+    return f"{content_hash}-{lineage}"
+
+
+def _build_or_load(columns, rows, previous=None, force=False):
+    """CatalogSnapshot (without a watcher token) for the given table.
+
+    Only one process builds a missing index (see index_store.build_lock);
+    the others wait and then attach to the artifact it published. With a
+    `previous` snapshot the index is patched rather than refitted, and
+    published under _patched_key; a fresh fit is always keyed by the
+    content hash alone, so cold starts never attach to a patched index.
+    `force` refits and replaces the artifact even if one exists."""
+    root = index_store.index_dir(DB_PATH)
+    content_hash = _catalog_hash(columns, rows)
+    key = content_hash if previous is None else _patched_key(content_hash, previous.key)
+    if not force:
+        index = index_store.load_index(root, key)
+        if index is not None:
+            return _attach_index(index, key, content_hash, "index artifact")
     
-    _cached_df = df
-    _cached_vectorizer = vectorizer
-    _cached_tfidf_matrix = tfidf_matrix
+    with index_store.build_lock(root):
+        if not force:
+            index = index_store.load_index(root, key)
+            if index is not None:
+                return _attach_index(index, key, content_hash, "index artifact")
+        
+        tfidf, engine, source = _fit_index(columns, rows, previous.tfidf if previous is not None else None)
+        if source == "fresh fit":
+            key = content_hash
+        try:
+            engine_columns, engine_arrays, engine_strings = engine.to_arrays()
+            engine_columns["tfidf_state"], tfidf_arrays = tfidf.to_arrays()
+            engine_arrays.update(tfidf_arrays)
+            index_store.save_index(
+                root, key, tfidf.vocabulary, tfidf.idf, tfidf.matrix,
+                engine_columns, engine_arrays, engine_strings, replace=force,
+            )
+        except OSError as e:
+            # A read-only deployment still works, it just refits on every cold start
+            print(f"[Recommender] Could not persist index artifact: {e}")
+            return _snapshot_of(tfidf, engine, key, content_hash, source)
     
-    print(f"[Recommender] TF-IDF cache warmed: {len(df)} movies, {tfidf_matrix.shape[1]} features")
+    # Serve from the published artifact too, so this process shares its pages
+    index = index_store.load_index(root, key)
+    if index is None:
+        return _snapshot_of(tfidf, engine, key, content_hash, source)
+    return _attach_index(index, key, content_hash, source)
+
+
+def _get_watcher():
+    global _watcher
+    if _watcher is None or _watcher.path != DB_PATH:
+        if _watcher is not None:
+            _watcher.close()
+        _watcher = CatalogWatcher(DB_PATH)
+    return _watcher
+
+
+def _load_snapshot(previous=None, force=False):
+    """Build a CatalogSnapshot of the current movies table, or None if it is
+    unavailable. Reuses `previous` when the content hash is unchanged;
+    `force` refits from scratch (see _build_or_load)."""
+    timer = _stats.timer("warm.")
+    token = _get_watcher().token()
+    catalog = _read_catalog()
+    timer.mark("read_catalog")
+    if catalog is None or not catalog[1]:
+        return None
+    
+    if previous is not None and _catalog_hash(*catalog) == previous.content_hash:
+        timer.mark("hash")
+        return previous._replace(token=token)
+    
+    snapshot = _build_or_load(*catalog, previous=previous, force=force)._replace(token=token)
+    timer.mark("index")
+    # Load or build the neighbor table here too, so neither the first
+    # similar_movies / diversity request nor the one after a reload pays for it
+    snapshot.neighbors.get(NEIGHBOR_K)
+    timer.mark("neighbors")
+    if _lsa_at_warm():
+        # Build the embedding here, off the request path
+        snapshot.lsa.get(LSA_COMPONENTS)
+        timer.mark("lsa")
+    _stats.set_gauge("last_warm_seconds", timer.done())
+    _stats.set_gauge("catalog_movies", snapshot.engine.size)
+    _stats.set_gauge("tfidf_features", snapshot.tfidf_matrix.shape[1])
+    return snapshot
+
+
+def _publish(snapshot):
+    """Make `snapshot` the one every new request reads."""
+    global _snapshot
+    previous = _snapshot
+    _snapshot = snapshot
+    if previous is not None and previous.key == snapshot.key:
+        return
+    # Cache keys carry the index key, so in-flight requests finishing on
+    # the old snapshot cannot poison the new one; old entries are just dead
+    _result_cache.clear()
+    _ranking_cache.clear()
+    print(
+        f"[Recommender] TF-IDF cache warmed ({snapshot.source}): "
+        f"{snapshot.engine.size} movies, {snapshot.tfidf_matrix.shape[1]} features"
+    )
+
+
+def _load_and_cache():
+    """Load the movie database and pre-compute the TF-IDF matrix once.
+    Reuses the on-disk index artifact when the table's content hash matches."""
+    snapshot = _load_snapshot()
+    if snapshot is not None:
+        _publish(snapshot)
 
 def warm_cache():
-    """Thread-safe cache warming. Called lazily on first request."""
+    """Thread-safe cache warming. Called lazily on first request.
+    With RETRIEVAL_MODE "fts5" only the FTS5 table is checked; nothing is
+    loaded into memory."""
+    if RETRIEVAL_MODE == "fts5":
+        _get_fts()
+        return
+    _warm_snapshot()
+
+def _warm_snapshot():
     with _cache_lock:
-        if _cached_df is None:
+        if _snapshot is None:
             _load_and_cache()
+        if CATALOG_REFRESH_INTERVAL is not None and _snapshot is not None:
+            _start_refresher(CATALOG_REFRESH_INTERVAL)
 
 def _get_cache():
-    """Get the cached data, loading it if necessary."""
-    if _cached_df is None:
-        warm_cache()
-    return _cached_df, _cached_vectorizer, _cached_tfidf_matrix
+    """Get the current snapshot, loading it if necessary (None if there is no catalog).
+    Only the in-memory paths call this, so it loads even under "fts5"."""
+    snapshot = _snapshot
+    if snapshot is None:
+        _warm_snapshot()
+        snapshot = _snapshot
+    return snapshot
+
+
+def _get_fts():
+    """(watcher token, FtsIndex) for movies.db, or (None, None) without a catalog.
+
+    The triggers keep the FTS5 table in step with edits to the movies table;
+    the table is re-checked (and rebuilt if needed) whenever the file's
+    watcher token changes, e.g. when movies.db is replaced."""
+    global _fts
+    token = _get_watcher().token()
+    current = _fts
+    if token is None:
+        return None, None
+    if current is not None and current[0] == token and current[1].path == DB_PATH:
+        return current
+    with _cache_lock:
+        if _fts is not None and _fts[0] == token and _fts[1].path == DB_PATH:
+            return _fts
+        timer = _stats.timer("warm.")
+        try:
+            fts = FtsIndex.open(DB_PATH, {"mentions_series": mentions_series})
+        except sqlite3.Error as e:
+            print(f"[Recommender ERROR] Could not open the FTS5 index in movies.db: {e}")
+            return None, None
+        timer.mark("fts")
+        # Building the table is itself a write; record the token after it
+        _fts = (_get_watcher().token(), fts)
+        _result_cache.clear()
+        _ranking_cache.clear()
+        return _fts
+
+
+def get_snapshot():
+    """The CatalogSnapshot new requests are served from (None before warm-up)."""
+    return _snapshot
+
+
+def catalog_available():
+    """True if requests can be served: the FTS5 table is usable under
+    RETRIEVAL_MODE "fts5", a snapshot is loaded otherwise. warm_cache()
+    only logs a missing or empty movies.db, so check this after it."""
+    if RETRIEVAL_MODE == "fts5":
+        return _get_fts()[1] is not None
+    return _snapshot is not None
+
+
+def _catalog_changed():
+    snapshot = _snapshot
+    return snapshot is None or _get_watcher().token() != snapshot.token
+
+
+def refresh_catalog(force=False):
+    """Rebuild from movies.db if it changed since the current snapshot and
+    swap the result in. `force` always rebuilds, with a full refit rather
+    than an incremental patch or an existing artifact. Returns True if a
+    different index is now being served."""
+    with _cache_lock:
+        if not force and not _catalog_changed():
+            return False
+        previous = _snapshot
+        snapshot = _load_snapshot(None if force else previous, force)
+        if snapshot is None:
+            return False
+        _publish(snapshot)
+        return previous is None or previous.key != snapshot.key
+
+
+def _start_refresher(interval):
+    global _refresher
+    if _refresher is not None and _refresher.is_alive():
+        return
+    _refresher = SnapshotRefresher(_catalog_changed, refresh_catalog, interval)
+    _refresher.start()
+
+
+def start_catalog_refresher(interval=None):
+    """Watch movies.db in a background thread and hot-swap the catalog on change."""
+    warm_cache()
+    with _cache_lock:
+        _start_refresher(interval or CATALOG_REFRESH_INTERVAL or 30.0)
+
+
+def stop_catalog_refresher():
+    global _refresher
+    with _cache_lock:
+        refresher, _refresher = _refresher, None
+    if refresher is not None:
+        refresher.stop()
+
+
+def build_index():
+    """Fit and publish the index artifact without keeping it in this process.
+
+    Run once in a parent process before forking workers: each worker then
+    attaches to the artifact instead of fitting its own copy. With
+    RETRIEVAL_MODE "fts5" this creates the FTS5 table in movies.db instead."""
+    if RETRIEVAL_MODE == "fts5":
+        return DB_PATH if _get_fts()[1] is not None else None
+    catalog = _read_catalog()
+    if catalog is None or not catalog[1]:
+        return None
+    snapshot = _build_or_load(*catalog)
+    # Optional parts this configuration will read, so no worker builds them
+    snapshot.neighbors.get(NEIGHBOR_K)
+    if _lsa_at_warm():
+        snapshot.lsa.get(LSA_COMPONENTS)
+    return os.path.join(index_store.index_dir(DB_PATH), snapshot.key)
+
+
+def get_memory_usage():
+    """Per-process memory report: RSS plus how many bytes of the loaded index
+    are shared (memory-mapped from the artifact) vs private to this worker."""
+    arrays = []
+    snapshot = _snapshot
+    if snapshot is not None:
+        matrix = snapshot.tfidf_matrix
+        arrays += [matrix.data, matrix.indices, matrix.indptr, snapshot.vectorizer.idf]
+        arrays.append(snapshot.tfidf.cosine_matrix().data)
+        arrays += snapshot.engine.arrays()
+    shared, private = index_store.memory_breakdown(arrays)
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": index_store.process_rss(),
+        "index_shared_bytes": shared,
+        "index_private_bytes": private,
+    }
+
+
+def configure_result_cache(maxsize=None, ttl=...):
+    """Resize the profile result cache and/or set its TTL in seconds (None = no expiry)."""
+    _result_cache.configure(maxsize=maxsize, ttl=ttl)
+
+
+def get_result_cache_stats():
+    """Hit/miss/eviction counters and current size of the profile result cache."""
+    return _result_cache.stats()
+
+
+def configure_metrics(enabled=True):
+    """Turn the per-stage instrumentation on or off (collected data is kept)."""
+    _stats.enabled = enabled
+
+
+def reset_stats():
+    _stats.reset()
+
+
+def get_stats():
+    """Per-stage latency (count, total, mean, p50, p99), warm-up gauges and
+    result cache counters. Stage names are "recommend.*", "batch.*", "fts.*",
+    "stream.*" and "warm.*"."""
+    stats = _stats.get_stats()
+    stats["result_cache"] = _result_cache.stats()
+    return stats
+
+
+def export_prometheus():
+    """get_stats() in Prometheus text format, e.g. for a /metrics route."""
+    cache = _result_cache.stats()
+    return _stats.to_prometheus(
+        extra_gauges={"result_cache_size": cache["size"]},
+        extra_counters={
+            "result_cache_" + name: cache[name] for name in ("hits", "misses", "evictions", "expirations")
+        },
+    )
 
 
 # ──────────────────────────────────────────────
@@ -229,19 +700,29 @@ VIBE_PHRASES = {
 }
 
 
+# Shuffled phrase sequences kept per (phrase count, seed). Seeds only
+# depend on vibe, industry and career stage, so they repeat across requests.
+PHRASE_SEQUENCE_CACHE_SIZE = 4096
+
+
 def _make_phrase_sequence(phrases, seed_str):
     """Create a deterministic shuffled sequence from phrases.
-    Returns a list where index i gives the phrase for recommendation i.
+    Returns a sequence where index i gives the phrase for recommendation i.
     This GUARANTEES no two recommendations share the same phrase."""
+    return _phrase_sequence(len(phrases), seed_str)
+
+
+@lru_cache(maxsize=PHRASE_SEQUENCE_CACHE_SIZE)
+def _phrase_sequence(count, seed_str):
     import random as _rng
-    seq = list(range(len(phrases)))
+    seq = list(range(count))
     _rng.Random(seed_str).shuffle(seq)
     # If we need more than len(phrases) recs, extend with a second shuffle
     if len(seq) < 15:
-        seq2 = list(range(len(phrases)))
+        seq2 = list(range(count))
         _rng.Random(seed_str + "_ext").shuffle(seq2)
         seq.extend(seq2)
-    return seq
+    return tuple(seq)
 
 def _get_phrase(phrases, sequence, rec_index):
     """Get a phrase from a pre-shuffled sequence by rec_index."""
@@ -252,17 +733,197 @@ def _get_phrase(phrases, sequence, rec_index):
 # ──────────────────────────────────────────────
 # MULTI-SIGNAL SCORING ENGINE
 # ──────────────────────────────────────────────
-def generate_recommendations(profile_data: dict, top_n: int = 10):
-    """
-    Generate career-matched movie recommendations using 6-signal scoring.
-    Each recommendation gets a unique, deeply personalized explanation.
-    """
-    df, vectorizer, tfidf_matrix = _get_cache()
-    
-    if df is None or df.empty:
-        return []
-    
-    # ── Build a rich query from the profile ──
+
+# Profiles scored per matrix product in generate_recommendations_batch.
+# Each chunk holds a few (chunk x catalog) float64 signal matrices.
+BATCH_CHUNK_SIZE = 64
+
+# Default for generate_recommendations(prune_candidates=...)
+PRUNE_CANDIDATES = False
+
+# Content signal: "sparse" = exact TF-IDF cosine, "lsa" = dense float32
+# TruncatedSVD embedding with LSA_COMPONENTS dims (approximate, faster),
+# "fts5" = SQLite bm25 over an FTS5 table in movies.db; only its best
+# FTS_CANDIDATES movies are read and scored, nothing is held in memory.
+# Default for generate_recommendations(retrieval=...).
+RETRIEVAL_MODES = ("sparse", "lsa", "fts5")
+RETRIEVAL_MODE = os.environ.get("MOVIEFY_RETRIEVAL", "sparse")
+FTS_CANDIDATES = 200
+# bm25 relevance at which the fts5 content signal reaches 0.5 (it saturates
+# towards 1.0 like a cosine, rather than being scaled to the best match)
+FTS_BM25_HALF = 20.0
+
+# Build the LSA embedding at warm time (and in build_index) even when
+# RETRIEVAL_MODE is not "lsa", so per-call retrieval="lsa" can be served.
+# Otherwise such calls are refused unless an embedding was already
+# persisted with the index: the TruncatedSVD fit takes seconds and never
+# runs on the request path.
+LSA_AT_WARM = os.environ.get("MOVIEFY_LSA", "0") == "1"
+
+
+def _lsa_at_warm():
+    return LSA_AT_WARM or RETRIEVAL_MODE == "lsa"
+
+
+def _check_retrieval(retrieval):
+    retrieval = retrieval or RETRIEVAL_MODE
+    if retrieval not in RETRIEVAL_MODES:
+        raise ValueError(f"unknown retrieval mode {retrieval!r}, expected one of {RETRIEVAL_MODES}")
+    return retrieval
+
+
+def _content_scorer(snapshot, retrieval):
+    """(query rows -> (queries x movies) content scores) for an in-memory
+    retrieval mode; the rows are (indices, data) pairs from _query_row."""
+    if retrieval == "lsa":
+        lsa, vectorizer = snapshot.lsa.peek(LSA_COMPONENTS), snapshot.vectorizer
+        if lsa is None:
+            raise ValueError(
+                f"retrieval='lsa' needs the LSA embedding (k={LSA_COMPONENTS}) built at warm time; "
+                "set LSA_AT_WARM (MOVIEFY_LSA=1) or RETRIEVAL_MODE='lsa'"
+            )
+        return lambda rows: lsa.scores(vectorizer.matrix(rows))
+    unit_matrix = snapshot.tfidf.cosine_matrix()
+    return lambda rows: sparse_cosine(rows, unit_matrix)
+
+
+# How a profile becomes its TF-IDF query row:
+#   "parity"   exactly vectorizer.transform([profile query string]): gaps
+#              listed 3x, the industry string doubled character-wise
+#              ("FinanceFinance"), bigrams across neighbouring fields
+#   "weighted" each field analyzed on its own, its term counts scaled by
+#              QUERY_FIELD_WEIGHTS (the industry's words really count 2x)
+# Both are built from memoized per-field term lists instead of
+# re-tokenizing the whole query string.
+QUERY_ENCODINGS = ("parity", "weighted")
+QUERY_ENCODING = os.environ.get("MOVIEFY_QUERY_ENCODING", "parity")
+QUERY_FIELD_WEIGHTS = {
+    "skill_gaps": 3,
+    "found_skills": 1,
+    "technologies": 1,
+    "industry": 2,
+    "secondary_industry": 1,
+    "career_stage": 1,
+}
+
+
+def _query_row(vectorizer, profile):
+    """(indices, data) TF-IDF row of a parsed profile, per QUERY_ENCODING."""
+    if QUERY_ENCODING == "weighted":
+        return vectorizer.encode_weighted(
+            (text, QUERY_FIELD_WEIGHTS[field]) for field, text in profile["query_fields"]
+        )
+    if QUERY_ENCODING != "parity":
+        raise ValueError(f"unknown query encoding {QUERY_ENCODING!r}, expected one of {QUERY_ENCODINGS}")
+    return vectorizer.encode_parts(profile["query_parts"])
+
+
+# Default for generate_recommendations(diversity=...). 0 keeps the plain
+# score order; larger values trade score for titles unlike the ones
+# already picked (see NeighborTable.diversify), chosen among the best
+# top_n * DIVERSITY_POOL.
+DIVERSITY = 0.0
+DIVERSITY_POOL = 3
+
+
+def _reranker(snapshot, diversity):
+    """(pool size factor, rerank(positions, scores, top_n) -> kept indices or None)."""
+    diversity = DIVERSITY if diversity is None else diversity
+    if not diversity:
+        return 1, None
+    table = snapshot.neighbors.get(NEIGHBOR_K)
+    return DIVERSITY_POOL, lambda positions, scores, top_n: table.diversify(positions, scores, top_n, diversity)
+
+
+# Hard constraints for generate_recommendations(filters=...), applied to
+# the catalog before scoring:
+#   "industries": names; keeps movies whose industry contains any of them
+#   "content_type": "Movie" or "Web Series"
+#   "min_educational_value_score": minimum on the 0–10 scale
+#   "exclude_ids": movie ids never to return (e.g. already watched)
+FILTER_KEYS = ("industries", "content_type", "min_educational_value_score", "exclude_ids")
+CONTENT_TYPES = ("Movie", "Web Series")
+
+
+def _check_filters(filters):
+    """Validated filters as a canonical tuple (part of the cache key), or None."""
+    if not filters:
+        return None
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"unknown filters {sorted(unknown)}, expected some of {FILTER_KEYS}")
+    content_type = filters.get("content_type")
+    if content_type is not None and content_type not in CONTENT_TYPES:
+        raise ValueError(f"unknown content_type {content_type!r}, expected one of {CONTENT_TYPES}")
+    industries = filters.get("industries") or ()
+    if isinstance(industries, str):
+        industries = [industries]
+    if not isinstance(industries, (list, tuple, set, frozenset)) or not all(
+        isinstance(name, str) for name in industries
+    ):
+        raise ValueError(f"industries must be a list of names, got {filters['industries']!r}")
+    min_edu = filters.get("min_educational_value_score")
+    if min_edu is not None:
+        try:
+            min_edu = float(min_edu)
+        except (TypeError, ValueError):
+            raise ValueError(f"min_educational_value_score must be a number, got {min_edu!r}") from None
+        if min_edu != min_edu:
+            raise ValueError("min_educational_value_score must be a number, got nan")
+    try:
+        exclude_ids = tuple(sorted({int(movie_id) for movie_id in filters.get("exclude_ids") or ()}))
+    except (TypeError, ValueError):
+        raise ValueError(f"exclude_ids must be movie ids, got {filters['exclude_ids']!r}") from None
+    facets = (tuple(sorted({name.lower() for name in industries})), content_type, min_edu, exclude_ids)
+    return None if facets == ((), None, None, ()) else facets
+
+
+def _facet_mask(engine, facets):
+    """Boolean mask of the movies `facets` (from _check_filters) allow, or None."""
+    if facets is None:
+        return None
+    industries, content_type, min_edu, exclude_ids = facets
+    series = None if content_type is None else content_type == "Web Series"
+    return engine.facet_mask(industries, series, min_edu, exclude_ids)
+
+
+def _fts_condition(facets):
+    """(SQL condition on the movies row `m`, params) for `facets`, so the
+    FTS5 search only ranks allowed movies; (None, ()) without facets.
+    Mirrors ScoringEngine.facet_mask, which still checks the rows read back."""
+    if facets is None:
+        return None, ()
+    industries, content_type, min_edu, exclude_ids = facets
+    clauses, params = [], []
+    if industries:
+        clauses.append("(" + " OR ".join(["instr(lower(m.industry), ?) > 0"] * len(industries)) + ")")
+        params += industries
+    if content_type is not None:
+        clauses.append(("" if content_type == "Web Series" else "NOT ") + "mentions_series(m.title, m.summary)")
+    if min_edu is not None:
+        # Same arithmetic as ScoringEngine.edu_scores, NULL counting as 5
+        clauses.append("min(coalesce(m.educational_value_score, 5) / 10.0, 1.0) >= ?")
+        params.append(min_edu / 10.0)
+    if exclude_ids:
+        clauses.append(f"m.id NOT IN ({','.join('?' * len(exclude_ids))})")
+        params += exclude_ids
+    return " AND ".join(clauses), params
+
+
+def _cache_variant(prune_candidates, retrieval, diversity=None, facets=None, batch=False):
+    variant = ("pruned" if prune_candidates else "") + ("" if retrieval == "sparse" else ":" + retrieval)
+    if batch and retrieval == "lsa":
+        # float32 matrix-matrix and matrix-vector products round differently
+        variant += ":batch"
+    if retrieval != "fts5" and QUERY_ENCODING != "parity":
+        variant += ":" + QUERY_ENCODING
+    diversity = DIVERSITY if diversity is None else diversity
+    variant += f":div{diversity}" if diversity else ""
+    return variant + (f":filter{facets!r}" if facets else "")
+
+
+def _parse_profile(profile_data: dict):
+    """Pull the scoring inputs out of a parsed profile and build its TF-IDF query."""
     skill_gaps = profile_data.get("skill_gaps", [])
     found_skills = profile_data.get("found_skills", [])
     industry = profile_data.get("industry", "")
@@ -281,93 +942,87 @@ def generate_recommendations(profile_data: dict, top_n: int = 10):
         query_parts.append(secondary_industry)
     query_parts.append(career_stage)
     
-    profile_query = " ".join(query_parts)
-    
-    if not profile_query.strip():
-        return []
-    
-    # ── Signal 1: Cosine Similarity (content relevance) ──
-    user_vector = vectorizer.transform([profile_query])
-    cosine_scores = cosine_similarity(user_vector, tfidf_matrix).flatten()
+    query_fields = [("skill_gaps", s) for s in skill_gaps] + [("found_skills", s) for s in found_skills]
+    query_fields += [("technologies", s) for s in technologies]
+    query_fields += [("industry", industry), ("secondary_industry", secondary_industry or ""), ("career_stage", career_stage)]
     
+    return {
+        "skill_gaps": skill_gaps,
+        "found_skills": found_skills,
+        "technologies": technologies,
+        "industry": industry,
+        "industry_lower": industry.lower(),
+        "secondary_ind_lower": secondary_industry.lower() if secondary_industry else "",
+        "career_stage": career_stage,
+        "vibe": vibe,
+        "all_user_skills": set(s.lower() for s in found_skills + skill_gaps + technologies),
+        "query": " ".join(query_parts),
+        "query_parts": query_parts,
+        "query_fields": query_fields,
+    }
+
+
+def _signal_scores(engine, profile, timer=NULL_TIMER):
+    """Signals 2–5 for one parsed profile (signal 6 is profile-independent)."""
     # ── Signal 2: Industry Match (exact + partial) ──
-    industry_lower = industry.lower()
-    secondary_ind_lower = secondary_industry.lower() if secondary_industry else ""
-    industry_scores = np.zeros(len(df))
-    for idx, row in df.iterrows():
-        movie_industry = str(row.get("industry", "")).lower()
-        if industry_lower and industry_lower in movie_industry:
-            industry_scores[idx] = 1.0
-        elif secondary_ind_lower and secondary_ind_lower in movie_industry:
-            industry_scores[idx] = 0.7
-        elif any(word in movie_industry for word in industry_lower.split()):
-            industry_scores[idx] = 0.3
+    industry_scores = engine.industry_table.get((profile["industry_lower"], profile["secondary_ind_lower"]))
+    timer.mark("industry")
     
     # ── Signal 3: Career Stage Match ──
-    stage_lower = career_stage.lower()
-    stage_scores = np.zeros(len(df))
-    for idx, row in df.iterrows():
-        movie_stage = str(row.get("career_stage", "")).lower()
-        if stage_lower and stage_lower in movie_stage:
-            stage_scores[idx] = 1.0
-        elif "all" in movie_stage:
-            stage_scores[idx] = 0.5
+    stage_scores = engine.stage_table.get((profile["career_stage"].lower(),))
+    timer.mark("stage")
 
     # ── Signal 4: Vibe-to-Genre Alignment ──
-    vibe_mapping = {
-        "Strategic Visionary": ["sci-fi", "biography", "epic", "future", "visionary", "pioneer", "revolution", "empire"],
-        "Analytical Stoic": ["mystery", "thriller", "documentary", "technical", "logic", "investigation", "puzzle", "heist"],
-        "Creative Free-Spirit": ["animation", "fantasy", "art", "music", "musical", "indie", "experimental", "surreal"],
-        "The Relentless Hustler": ["crime", "drama", "action", "competition", "business", "wall street", "hustle", "rise"],
-        "Empathic Leader": ["romance", "family", "social", "community", "leadership", "mentor", "sacrifice", "unity"],
-        "Pragmatic Builder": ["war", "adventure", "construction", "survival", "endurance", "engineering", "mission"],
-    }
-    relevant_genres = vibe_mapping.get(vibe, [])
-    vibe_scores = np.zeros(len(df))
-    if relevant_genres:
-        for idx, row in df.iterrows():
-            movie_text = (str(row.get("summary", "")) + " " + str(row.get("career_skills", ""))).lower()
-            hits = sum(1 for g in relevant_genres if g in movie_text)
-            vibe_scores[idx] = min(hits / 3.0, 1.0)  # Graduated scoring
-
-    # ── Signal 5: Skill Overlap Depth ──
-    skill_depth_scores = np.zeros(len(df))
-    all_user_skills = set(s.lower() for s in found_skills + skill_gaps + technologies)
-    for idx, row in df.iterrows():
-        movie_skills = str(row.get("career_skills", "")).lower()
-        overlap = sum(1 for s in all_user_skills if s in movie_skills)
-        skill_depth_scores[idx] = min(overlap / max(len(all_user_skills), 1), 1.0)
-
-    # ── Signal 6: Educational Value Score ──
-    edu_scores = np.zeros(len(df))
-    for idx, row in df.iterrows():
-        edu_scores[idx] = min(row.get("educational_value_score", 5) / 10.0, 1.0)
-    
-    # ── Weighted Composite Score ──
-    composite = (
-        0.35 * cosine_scores +
-        0.20 * industry_scores +
-        0.15 * vibe_scores +
-        0.15 * skill_depth_scores +
-        0.10 * stage_scores +
-        0.05 * edu_scores
+    vibe_scores = engine.vibe_table.get((profile["vibe"],))
+    timer.mark("vibe")
+
+    # ── Signal 5: Skill Overlap Depth (inverted skill index) ──
+    skill_depth_scores = engine.skill_depth_scores(profile["all_user_skills"])
+    timer.mark("skill_depth")
+
+    return industry_scores, stage_scores, vibe_scores, skill_depth_scores
+
+
+def _composite_scores(*signals):
+    """Weighted composite normalized to 0–100% along the last (movie) axis."""
+    composite = _weighted_composite(*signals)
+    return _normalize(composite, composite.max(axis=-1, keepdims=True))
+
+
+def _weighted_composite(cosine_scores, industry_scores, stage_scores, vibe_scores, skill_depth_scores, edu_scores):
+    return (
+        W_COSINE * cosine_scores +
+        W_INDUSTRY * industry_scores +
+        W_VIBE * vibe_scores +
+        W_SKILL_DEPTH * skill_depth_scores +
+        W_STAGE * stage_scores +
+        W_EDU * edu_scores
     )
-    
-    # ── Normalize to 0–100% ──
-    max_score = composite.max()
-    if max_score > 0:
-        normalized = (composite / max_score) * 100
-    else:
-        normalized = composite * 100
-    
-    df_scored = df.copy()
-    df_scored["match_score"] = normalized
-    
-    # ── Rank and select top N ──
-    top_matches = df_scored.sort_values(by="match_score", ascending=False).head(top_n)
+
+
+def _normalize(composite, max_score):
+    """Composite scores as 0–100% of `max_score`, the best composite among all scored movies."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(max_score > 0, (composite / max_score) * 100, composite * 100)
+
+
+def _content_type(engine, pos):
+    """Content Type: "Web Series" or "Movie" (see scoring_engine.mentions_series)."""
+    return "Web Series" if engine.is_series(pos) else "Movie"
+
+
+def _explainer(profile, engine):
+    """explain(pos, score, rec_index) -> recommendation dict for one parsed
+    profile. rec_index is the item's rank, which picks its phrases, so an
+    item renders the same whether it is built in a list or streamed."""
+    vibe = profile["vibe"]
+    industry = profile["industry"]
+    industry_lower = profile["industry_lower"]
+    skill_gaps = profile["skill_gaps"]
+    found_skills = profile["found_skills"]
 
     # ── Build deterministic phrase sequences (unique per profile) ──
-    seed_base = vibe + industry + career_stage
+    seed_base = vibe + industry + profile["career_stage"]
     vibe_pool = VIBE_PHRASES.get(vibe, VIBE_PHRASES["Pragmatic Builder"])
     vibe_seq = _make_phrase_sequence(vibe_pool, seed_base + "_vibe")
     gap_seq = _make_phrase_sequence(GAP_PHRASES, seed_base + "_gap")
@@ -376,20 +1031,13 @@ def generate_recommendations(profile_data: dict, top_n: int = 10):
     gen_seq = _make_phrase_sequence(GENERIC_PHRASES, seed_base + "_gen")
 
     # ── Generate Rich, UNIQUE Explanations ──
-    recommendations = []
-    rec_index = 0
-    for _, row in top_matches.iterrows():
+    def explain(pos, score, rec_index):
+        row = engine.display.row(pos)
         movie_title = row["title"]
-        movie_summary = str(row.get("summary", "")).lower()
-        movie_skills = str(row.get("career_skills", "")).lower()
-        
-        # Heuristic for Content Type
-        is_series = any(kw in movie_title.lower() or kw in movie_summary 
-                        for kw in ["series", "season", "episode", "part ", "vol ", "miniseries"])
-        content_type = "Web Series" if is_series else "Movie"
+        content_type = _content_type(engine, pos)
 
-        matched_gaps = [g for g in skill_gaps if g.lower() in movie_skills]
-        matched_existing = [s for s in found_skills if s.lower() in movie_skills]
+        matched_gaps = [g for g in skill_gaps if engine.skills.contains(g.lower(), pos)]
+        matched_existing = [s for s in found_skills if engine.skills.contains(s.lower(), pos)]
         
         explanation_parts = []
         
@@ -417,7 +1065,7 @@ def generate_recommendations(profile_data: dict, top_n: int = 10):
         if len(explanation_parts) <= 1:
             explanation_parts.append(_get_phrase(GENERIC_PHRASES, gen_seq, rec_index))
         
-        rec = {
+        return {
             "id": int(row["id"]),
             "title": movie_title,
             "type": content_type,
@@ -426,9 +1074,595 @@ def generate_recommendations(profile_data: dict, top_n: int = 10):
             "industry": row["industry"],
             "summary": row["summary"],
             "explanation": " ".join(explanation_parts),
-            "match_score": round(float(row["match_score"]) / 100.0, 4),
+            "match_score": round(float(score) / 100.0, 4),
         }
-        recommendations.append(rec)
-        rec_index += 1
     
+    return explain
+
+
+def _build_explanations(positions, scores, profile, engine):
+    """Turn ranked catalog positions and their 0–100 scores into recommendation dicts."""
+    explain = _explainer(profile, engine)
+    return [explain(pos, score, rec_index) for rec_index, (pos, score) in enumerate(zip(positions, scores))]
+
+
+def generate_recommendations(profile_data: dict, top_n: int = 10, use_cache: bool = True,
+                             prune_candidates: bool = None, retrieval: str = None, diversity: float = None,
+                             filters: dict = None):
+    """
+    Generate career-matched movie recommendations using 6-signal scoring.
+    Each recommendation gets a unique, deeply personalized explanation.
+    Repeated profiles are answered from the result cache.
+
+    With prune_candidates, only movies sharing a skill or a TF-IDF term with
+    the profile are fully scored, plus the best top_n of the rest taken
+    from a memoized ordering (their score depends only on industry, stage
+    and vibe). Results are identical to the unpruned ranking.
+
+    retrieval picks the content signal ("sparse", "lsa" or "fts5", default
+    RETRIEVAL_MODE); see RETRIEVAL_MODE above. "lsa" raises ValueError
+    unless its embedding was built at warm time (see LSA_AT_WARM). "sparse"
+    is scored by the SHARDS worker processes when that is set (pruning is
+    then skipped).
+
+    diversity > 0 re-ranks the best candidates so the list is not a run of
+    near-duplicates, using the precomputed neighbor table (default
+    DIVERSITY; not available with "fts5").
+
+    filters restricts the result to movies matching every given facet (see
+    FILTER_KEYS); the others are dropped before scoring, and match_score
+    is then relative to the best allowed movie. With "fts5" the filters
+    are part of the bm25 query, so its FTS_CANDIDATES are all allowed.
+    """
+    retrieval = _check_retrieval(retrieval)
+    facets = _check_filters(filters)
+    if retrieval == "fts5":
+        if diversity:
+            raise ValueError("diversity needs the in-memory index, not retrieval='fts5'")
+        return _fts_recommendations(profile_data, top_n, use_cache, facets)
+    
+    snapshot = _get_cache()
+    
+    if snapshot is None or not snapshot.engine.size:
+        return []
+    
+    if prune_candidates is None:
+        prune_candidates = PRUNE_CANDIDATES
+    content_scores = _content_scorer(snapshot, retrieval)
+    rerank = _reranker(snapshot, diversity)
+    
+    timer = _stats.timer("recommend.")
+    if use_cache:
+        cache_key = profile_key(
+            profile_data, top_n, snapshot.key, variant=_cache_variant(prune_candidates, retrieval, diversity, facets)
+        )
+        cached = _result_cache.get(cache_key)
+        timer.mark("cache_lookup")
+        if cached is not None:
+            timer.done()
+            return cached
+    
+    shards = _get_shards(snapshot) if retrieval == "sparse" else None
+    if shards is not None:
+        profile = _parse_profile(profile_data)
+        timer.mark("parse")
+        recommendations = []
+        if profile["query"].strip():
+            recommendations = _score_sharded(shards, snapshot, [profile], top_n, rerank, facets, timer)[0]
+    else:
+        recommendations = _score_profile(
+            profile_data, top_n, snapshot.vectorizer, content_scores, snapshot.engine, prune_candidates, timer, rerank,
+            _facet_mask(snapshot.engine, facets),
+        )
+    if use_cache:
+        _result_cache.put(cache_key, recommendations)
+    timer.done()
+    return recommendations
+
+
+def _score_profile(profile_data, top_n, vectorizer, content_scores, engine, prune_candidates=False, timer=NULL_TIMER,
+                   rerank=(1, None), allowed=None):
+    """Uncached single-profile scoring behind generate_recommendations.
+    `allowed` is the facet mask of the movies that may be returned."""
+    pool_factor, rerank = rerank
+    pool = top_n * pool_factor
+    # ── Build a rich query from the profile ──
+    profile = _parse_profile(profile_data)
+    timer.mark("parse")
+    
+    scored = _profile_scores(profile, vectorizer, content_scores, engine, allowed, pool if prune_candidates else None, timer)
+    if scored is None:
+        return []
+    normalized, candidates = scored
+    
+    # ── Rank and select top N (no catalog copy, no full sort) ──
+    top_idx = top_k(normalized, pool)
+    positions = top_idx if candidates is None else candidates[top_idx]
+    timer.mark("top_k")
+    if rerank is not None:
+        keep = rerank(positions, normalized[top_idx], top_n)
+        top_idx, positions = top_idx[keep], positions[keep]
+        timer.mark("rerank")
+
+    recommendations = _build_explanations(positions, normalized[top_idx], profile, engine)
+    timer.mark("explanations")
+    return recommendations
+
+
+def _profile_scores(profile, vectorizer, content_scores, engine, allowed=None, prune_pool=None, timer=NULL_TIMER):
+    """(0–100 composite scores, their catalog rows or None for every row)
+    of one parsed profile, or None when there is nothing to score.
+    With prune_pool, only the rows that can reach the best prune_pool are kept."""
+    if not profile["query"].strip():
+        return None
+    
+    # ── Signal 1: Cosine Similarity (content relevance) ──
+    user_vector = _query_row(vectorizer, profile)
+    timer.mark("transform")
+    cosine_scores = content_scores([user_vector])[0]
+    timer.mark("cosine")
+    
+    # ── Signals 2–6 ──
+    signals = (cosine_scores,) + _signal_scores(engine, profile, timer) + (engine.edu_scores,)
+    candidates = None
+    
+    # ── Facet filters: only allowed movies are scored ──
+    if allowed is not None:
+        candidates = np.flatnonzero(allowed)
+        timer.mark("filter")
+    
+    # ── Optional pruning: movies with a TF-IDF or skill-index hit, plus the
+    #    top N of everything else by its (content-free) prior score ──
+    if prune_pool is not None:
+        evidence = np.union1d(np.flatnonzero(cosine_scores), engine.skills.candidates(profile["all_user_skills"]))
+        prior_order = engine.prior_orders.get((
+            profile["industry_lower"], profile["secondary_ind_lower"], profile["career_stage"].lower(), profile["vibe"],
+        ))
+        if allowed is not None:
+            evidence = evidence[allowed[evidence]]
+            prior_order = prior_order[allowed[prior_order]]
+        prefix = prior_order[:prune_pool + len(evidence)]
+        rest = prefix[~np.isin(prefix, evidence)][:prune_pool]
+        candidates = np.union1d(evidence, rest)
+        timer.mark("prune")
+    
+    if candidates is not None:
+        if not len(candidates):
+            return None
+        signals = tuple(s[candidates] for s in signals)
+    
+    # ── Weighted Composite Score, normalized to 0–100% ──
+    normalized = _composite_scores(*signals)
+    timer.mark("composite")
+    return normalized, candidates
+
+
+def _fts_recommendations(profile_data, top_n, use_cache=True, facets=None):
+    """generate_recommendations for retrieval="fts5"."""
+    token, fts = _get_fts()
+    if fts is None:
+        return []
+    
+    timer = _stats.timer("fts.")
+    if use_cache:
+        cache_key = profile_key(profile_data, top_n, repr(token), variant=_cache_variant(False, "fts5", 0, facets))
+        cached = _result_cache.get(cache_key)
+        timer.mark("cache_lookup")
+        if cached is not None:
+            timer.done()
+            return cached
+    
+    recommendations = _score_fts(profile_data, top_n, fts, timer, facets)
+    if use_cache:
+        _result_cache.put(cache_key, recommendations)
+    timer.done()
+    return recommendations
+
+
+def _score_fts(profile_data, top_n, fts, timer=NULL_TIMER, facets=None):
+    """Score the FTS5 candidates of one profile.
+
+    bm25 relevance, squashed into [0, 1) by FTS_BM25_HALF, stands in for
+    the cosine signal; signals 2–6 and the explanations come from a
+    throwaway engine over just the candidate rows. Movies without a single
+    matching word are never considered."""
+    profile = _parse_profile(profile_data)
+    timer.mark("parse")
+    
+    scored = _fts_scores(profile, fts, facets, timer)
+    if scored is None:
+        return []
+    engine, normalized, candidates = scored
+    top_idx = top_k(normalized, top_n)
+    positions = top_idx if candidates is None else candidates[top_idx]
+    timer.mark("top_k")
+    
+    recommendations = _build_explanations(positions, normalized[top_idx], profile, engine)
+    timer.mark("explanations")
     return recommendations
+
+
+def _fts_scores(profile, fts, facets=None, timer=NULL_TIMER):
+    """(candidate engine, 0–100 scores, their engine rows or None for all)
+    for one parsed profile, or None when nothing matches."""
+    if not profile["query"].strip():
+        return None
+    
+    rows, relevance = fts.search(profile["query"], FTS_CANDIDATES, *_fts_condition(facets))
+    timer.mark("search")
+    if not rows:
+        return None
+    
+    engine = ScoringEngine.from_records(FtsIndex.ROW_COLUMNS, rows)
+    engine.vibe_genres = VIBE_GENRES
+    relevance = np.maximum(np.asarray(relevance, dtype=np.float64), 0.0)
+    content_scores = relevance / (relevance + FTS_BM25_HALF)
+    timer.mark("engine")
+    signals = (content_scores,) + _signal_scores(engine, profile, timer) + (engine.edu_scores,)
+    
+    candidates = None
+    allowed = _facet_mask(engine, facets)
+    if allowed is not None:
+        candidates = np.flatnonzero(allowed)
+        if not len(candidates):
+            return None
+        signals = tuple(s[candidates] for s in signals)
+        timer.mark("filter")
+    
+    normalized = _composite_scores(*signals)
+    timer.mark("composite")
+    return engine, normalized, candidates
+
+
+def generate_recommendations_batch(profiles, top_n: int = 10, chunk_size: int = BATCH_CHUNK_SIZE, use_cache: bool = True,
+                                   retrieval: str = None, diversity: float = None, filters: dict = None):
+    """
+    Score many profiles at once: one sparse cosine (or dense LSA) product
+    per chunk of query rows, with (profiles x movies)
+    signal matrices. Returns one list per profile, identical to calling
+    generate_recommendations on each profile in turn; with retrieval="lsa"
+    the float32 BLAS product may round a match_score (and so rarely an
+    order) differently, and those lists are cached apart from single calls.
+    (retrieval="fts5" runs one bm25 query per profile.) `filters` apply to
+    every profile of the batch.
+    """
+    profiles = list(profiles)
+    retrieval = _check_retrieval(retrieval)
+    facets = _check_filters(filters)
+    if retrieval == "fts5":
+        if diversity:
+            raise ValueError("diversity needs the in-memory index, not retrieval='fts5'")
+        return [_fts_recommendations(p, top_n, use_cache, facets) for p in profiles]
+    
+    snapshot = _get_cache()
+    
+    if snapshot is None or not snapshot.engine.size:
+        return [[] for _ in profiles]
+    vectorizer, engine = snapshot.vectorizer, snapshot.engine
+    content_scores = _content_scorer(snapshot, retrieval)
+    pool_factor, rerank = _reranker(snapshot, diversity)
+    allowed = _facet_mask(engine, facets)
+    candidates = None if allowed is None else np.flatnonzero(allowed)
+    if candidates is not None and not len(candidates):
+        return [[] for _ in profiles]
+    edu_scores = engine.edu_scores if candidates is None else engine.edu_scores[candidates]
+    
+    timer = _stats.timer("batch.")
+    results = [[] for _ in profiles]
+    cache_keys = [None] * len(profiles)
+    cached_rows = set()
+    if use_cache:
+        variant = _cache_variant(False, retrieval, diversity, facets, batch=True)
+        cache_keys = [profile_key(p, top_n, snapshot.key, variant=variant) for p in profiles]
+        for i, key in enumerate(cache_keys):
+            cached = _result_cache.get(key)
+            if cached is not None:
+                results[i] = cached
+                cached_rows.add(i)
+    
+    timer.mark("cache_lookup")
+    parsed = [_parse_profile(p) for p in profiles]
+    # Profiles with an empty query get no recommendations, same as the single path
+    scorable = [i for i, p in enumerate(parsed) if i not in cached_rows and p["query"].strip()]
+    timer.mark("parse")
+    
+    shards = _get_shards(snapshot) if retrieval == "sparse" else None
+    step = max(chunk_size, 1)
+    for chunk_start in range(0, len(scorable), step):
+        rows = scorable[chunk_start:chunk_start + step]
+        chunk = [parsed[i] for i in rows]
+        
+        if shards is not None:
+            sharded = _score_sharded(shards, snapshot, chunk, top_n, (pool_factor, rerank), facets, timer)
+            for i, recommendations in zip(rows, sharded):
+                results[i] = recommendations
+                if use_cache:
+                    _result_cache.put(cache_keys[i], recommendations)
+            continue
+        
+        # ── Signal 1: all query vectors stacked into one sparse matrix ──
+        user_rows = [_query_row(vectorizer, p) for p in chunk]
+        timer.mark("transform")
+        cosine_matrix = content_scores(user_rows)
+        timer.mark("cosine")
+        
+        # ── Signals 2–5 as (profiles x movies) matrices ──
+        signals = [_signal_scores(engine, p) for p in chunk]
+        industry_matrix, stage_matrix, vibe_matrix, skill_matrix = (np.vstack(s) for s in zip(*signals))
+        if candidates is not None:
+            cosine_matrix, industry_matrix, stage_matrix, vibe_matrix, skill_matrix = (
+                m[:, candidates] for m in (cosine_matrix, industry_matrix, stage_matrix, vibe_matrix, skill_matrix)
+            )
+        timer.mark("signals")
+        
+        normalized = _composite_scores(
+            cosine_matrix, industry_matrix, stage_matrix, vibe_matrix, skill_matrix, edu_scores
+        )
+        timer.mark("composite")
+        
+        for row_scores, i in zip(normalized, rows):
+            top_idx = top_k(row_scores, top_n * pool_factor)
+            positions = top_idx if candidates is None else candidates[top_idx]
+            if rerank is not None:
+                keep = rerank(positions, row_scores[top_idx], top_n)
+                top_idx, positions = top_idx[keep], positions[keep]
+            results[i] = _build_explanations(positions, row_scores[top_idx], parsed[i], engine)
+            if use_cache:
+                _result_cache.put(cache_keys[i], results[i])
+        timer.mark("rank_explain")
+    
+    timer.done()
+    return results
+
+
+# ──────────────────────────────────────────────
+# SHARDED SCORING
+# With SHARDS > 1, "sparse" scoring fans out to that many worker processes
+# (see sharded_engine.py), each owning one contiguous row range: its slice
+# of the normalized TF-IDF matrix and a ScoringEngine over its rows, all
+# attached from the index artifact, so vocabulary and IDF stay global. The
+# query row is encoded once here; every shard returns its best raw
+# composites and its maximum, and match_score is normalized by the
+# maximum over all shards, exactly as in a single process.
+# ──────────────────────────────────────────────
+
+# Worker processes for "sparse" scoring; 0 or 1 scores in this process
+SHARDS = int(os.environ.get("MOVIEFY_SHARDS", "0"))
+
+_shards = (None, None)  # ((catalog key, shard count), ShardPool or None)
+_shards_lock = threading.Lock()
+
+
+def _get_shards(snapshot):
+    """The ShardPool for `snapshot`, started on first use; None when SHARDS
+    is off or the snapshot has no index artifact for workers to attach to."""
+    global _shards
+    wanted = (snapshot.key, SHARDS)
+    if SHARDS <= 1:
+        return None
+    if _shards[0] == wanted:
+        return _shards[1]
+    with _shards_lock:
+        if _shards[0] == wanted:
+            return _shards[1]
+        if _shards[1] is not None:
+            _shards[1].close()
+        root = index_store.index_dir(DB_PATH)
+        pool = None
+        if os.path.isdir(os.path.join(root, snapshot.key)):
+            bounds = shard_bounds(snapshot.engine.size, SHARDS)
+            pool = ShardPool(bounds, partial(_load_shard, root, snapshot.key), _score_shard)
+            print(f"[Recommender] Scoring {snapshot.engine.size} movies in {len(pool)} shard processes")
+        else:
+            print("[Recommender] No index artifact for shard workers to attach to; scoring in-process")
+        _shards = (wanted, pool)
+        return pool
+
+
+def close_shards():
+    """Stop the shard worker processes (they restart on the next sharded request)."""
+    global _shards
+    with _shards_lock:
+        if _shards[1] is not None:
+            _shards[1].close()
+        _shards = (None, None)
+
+
+def _load_shard(root, key, start, stop):
+    """Worker side: (first row, normalized TF-IDF rows, engine) of one shard."""
+    index = index_store.load_index(root, key)
+    if index is None:
+        raise RuntimeError(f"index artifact {key} is missing from {root}")
+    tfidf, engine = _index_parts(index)
+    engine = engine.slice(start, stop)
+    engine.precompute_tables(VIBE_GENRES, KNOWN_INDUSTRIES, KNOWN_CAREER_STAGES)
+    return start, tfidf.cosine_matrix()[start:stop], engine
+
+
+def _score_shard(shard, query_rows, profiles, k, facets):
+    """Worker side: per profile, the shard's k best (catalog rows, raw
+    composite scores) and its best raw composite, or None if the filters
+    leave the shard empty."""
+    start, unit_matrix, engine = shard
+    allowed = _facet_mask(engine, facets)
+    candidates = None if allowed is None else np.flatnonzero(allowed)
+    if candidates is not None and not len(candidates):
+        return [None] * len(profiles)
+    
+    results = []
+    for profile, cosine_scores in zip(profiles, sparse_cosine(query_rows, unit_matrix)):
+        signals = (cosine_scores,) + _signal_scores(engine, profile) + (engine.edu_scores,)
+        if candidates is not None:
+            signals = tuple(s[candidates] for s in signals)
+        composite = _weighted_composite(*signals)
+        top = top_k(composite, k)
+        positions = top if candidates is None else candidates[top]
+        results.append((positions + start, composite[top], composite.max()))
+    return results
+
+
+def _score_sharded(shards, snapshot, profiles, top_n, rerank, facets, timer=NULL_TIMER):
+    """Recommendation lists for parsed, non-empty profiles, scored by the shards."""
+    pool_factor, rerank = rerank
+    pool = top_n * pool_factor
+    query_rows = [_query_row(snapshot.vectorizer, p) for p in profiles]
+    timer.mark("transform")
+    per_shard = shards.map(query_rows, profiles, pool, facets)
+    timer.mark("shards")
+    
+    results = []
+    for profile, tops in zip(profiles, zip(*per_shard)):
+        tops = [top for top in tops if top is not None]
+        if not tops:
+            results.append([])
+            continue
+        positions = np.concatenate([top[0] for top in tops])
+        normalized = _normalize(np.concatenate([top[1] for top in tops]), max(top[2] for top in tops))
+        # Same order as top_k over the whole catalog: score, then row
+        order = np.lexsort((positions, -normalized))[:pool]
+        positions, normalized = positions[order], normalized[order]
+        if rerank is not None:
+            keep = rerank(positions, normalized, top_n)
+            positions, normalized = positions[keep], normalized[keep]
+        results.append(_build_explanations(positions, normalized, profile, snapshot.engine))
+    timer.mark("merge")
+    return results
+
+
+# ──────────────────────────────────────────────
+# STREAMING & PAGINATION
+# iter_recommendations scores a profile once and keeps the ranking in a
+# small LRU, so a follow-up page (offset=N) only renders more items.
+# Ranks are sorted and explanations formatted as the consumer pulls them.
+# ──────────────────────────────────────────────
+
+# Rankings kept for follow-up pages; each holds one float per scored movie
+RANKING_CACHE_SIZE = 128
+# Ranks rendered per step of the stream
+STREAM_PAGE = 16
+
+_ranking_cache = ResultCache(maxsize=RANKING_CACHE_SIZE, copy=False)
+
+
+def iter_recommendations(profile_data: dict, offset: int = 0, limit: int = None, use_cache: bool = True,
+                         retrieval: str = None, filters: dict = None):
+    """
+    Generator of recommendations in rank order, from rank `offset` on and
+    at most `limit` of them (None: the whole ranking). Each item equals
+    the generate_recommendations entry at the same rank, but its
+    explanation is only rendered when the item is consumed.
+
+    The profile is scored when this is called, not on the first next(),
+    and its ranking is cached: `offset` is the cursor (the number of items
+    already delivered), and a later page resumes without rescoring.
+    Diversity re-ranking is not offered here because its order depends on
+    how many items are requested.
+    """
+    retrieval = _check_retrieval(retrieval)
+    facets = _check_filters(filters)
+    offset = max(int(offset), 0)
+    ranked = _ranked(profile_data, retrieval, facets, use_cache)
+    if ranked is None:
+        return iter(())
+    total = len(ranked[2])
+    stop = total if limit is None else min(offset + max(limit, 0), total)
+    return _stream(ranked, offset, stop)
+
+
+def _ranked(profile_data, retrieval, facets, use_cache=True):
+    """(parsed profile, engine, LazyRanking) of one profile, or None if it gets no results."""
+    timer = _stats.timer("stream.")
+    if retrieval == "fts5":
+        token, fts = _get_fts()
+        if fts is None:
+            return None
+        catalog_key = repr(token)
+    else:
+        snapshot = _get_cache()
+        if snapshot is None or not snapshot.engine.size:
+            return None
+        catalog_key = snapshot.key
+    
+    if use_cache:
+        cache_key = profile_key(profile_data, 0, catalog_key, variant="stream" + _cache_variant(False, retrieval, 0, facets))
+        cached = _ranking_cache.get(cache_key)
+        timer.mark("cache_lookup")
+        if cached is not None:
+            timer.done()
+            return cached
+    
+    profile = _parse_profile(profile_data)
+    timer.mark("parse")
+    if retrieval == "fts5":
+        scored = _fts_scores(profile, fts, facets, timer)
+        engine, scored = (scored[0], scored[1:]) if scored is not None else (None, None)
+    else:
+        engine = snapshot.engine
+        scored = _profile_scores(
+            profile, snapshot.vectorizer, _content_scorer(snapshot, retrieval), engine, _facet_mask(engine, facets),
+            timer=timer,
+        )
+    if scored is None:
+        timer.done()
+        return None
+    
+    ranked = (profile, engine, LazyRanking(*scored, first=STREAM_PAGE))
+    if use_cache:
+        _ranking_cache.put(cache_key, ranked)
+    timer.done()
+    return ranked
+
+
+def _stream(ranked, start, stop):
+    profile, engine, ranking = ranked
+    explain = _explainer(profile, engine)
+    for page_start in range(start, stop, STREAM_PAGE):
+        positions, scores = ranking.page(page_start, min(page_start + STREAM_PAGE, stop))
+        for rec_index, (pos, score) in enumerate(zip(positions, scores), page_start):
+            yield explain(pos, score, rec_index)
+
+
+def ndjson_lines(recommendations):
+    """Encode a recommendation stream as NDJSON, one object per line, e.g.
+    StreamingResponse(ndjson_lines(iter_recommendations(profile)), media_type="application/x-ndjson")."""
+    for rec in recommendations:
+        yield json.dumps(rec, ensure_ascii=False) + "\n"
+
+
+def sse_events(recommendations, offset=0):
+    """Encode a recommendation stream as server-sent events (media type
+    "text/event-stream"). Each "recommendation" event's id is the offset to
+    resume from, which browsers send back as Last-Event-ID on reconnect;
+    a final "end" event carries {"next_offset": ...}. `offset` is the one
+    the stream was started at."""
+    next_offset = offset
+    for rec in recommendations:
+        next_offset += 1
+        yield f"id: {next_offset}\nevent: recommendation\ndata: {json.dumps(rec, ensure_ascii=False)}\n\n"
+    yield f"id: {next_offset}\nevent: end\ndata: {json.dumps({'next_offset': next_offset})}\n\n"
+
+
+# ──────────────────────────────────────────────
+# MORE LIKE THIS
+# ──────────────────────────────────────────────
+
+def similar_movies(movie_id, k: int = 10):
+    """The k movies whose text is most similar to `movie_id` (TF-IDF cosine),
+    read from the precomputed neighbor table in O(k); at most NEIGHBOR_K.
+    Returns [] for an id that is not in the catalog."""
+    snapshot = _get_cache()
+    if snapshot is None:
+        return []
+    display = snapshot.engine.display
+    pos = display.position(movie_id)
+    if pos is None:
+        return []
+    
+    positions, scores = snapshot.neighbors.get(NEIGHBOR_K).neighbors(pos, k)
+    results = []
+    for neighbor, score in zip(positions.tolist(), scores.tolist()):
+        row = display.row(neighbor)
+        row["type"] = _content_type(snapshot.engine, neighbor)
+        row["similarity"] = round(score, 4)
+        results.append(row)
+    return results
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# ──────────────────────────────────────────────
+# PROFILE-LEVEL RESULT CACHE
+# Bounded LRU with an optional TTL, keyed by a canonical hash of the
+# fields generate_recommendations actually reads.
+# ──────────────────────────────────────────────
+
+_PROFILE_LIST_FIELDS = ("skill_gaps", "found_skills", "technologies")
+_PROFILE_TEXT_FIELDS = ("industry", "secondary_industry", "career_stage")
+
+
+def profile_key(profile_data: dict, top_n: int, catalog_key="", variant=""):
+    """Canonical cache key for a profile request.
+
+    Extra keys (years_of_experience, raw text, ...), dict ordering, missing
+    fields vs their defaults and None vs "" all collapse to the same key.
+    List order and casing are kept: both change the TF-IDF query bigrams
+    and the explanation text, so they must not share a cache entry."""
+    canonical = {name: list(profile_data.get(name) or []) for name in _PROFILE_LIST_FIELDS}
+    for name in _PROFILE_TEXT_FIELDS:
+        canonical[name] = profile_data.get(name) or ""
+    canonical["vibe"] = profile_data.get("vibe", "Pragmatic Builder")
+    payload = json.dumps([catalog_key, top_n, variant, canonical], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU of recommendation lists with hit/miss/eviction counters.
+
+    With copy=False values are stored and returned as given, for entries
+    nobody mutates (e.g. the rankings behind iter_recommendations)."""
+
+    def __init__(self, maxsize=1024, ttl=None, copy=True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.copy = copy
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Cached recommendations (as fresh dict copies) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return [dict(rec) for rec in value] if self.copy else value
+
+    def put(self, key, recommendations):
+        if self.maxsize <= 0:
+            return
+        value = tuple(dict(rec) for rec in recommendations) if self.copy else recommendations
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def configure(self, maxsize=None, ttl=...):
+        """Change the size limit and/or TTL (seconds, None = no expiry)."""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+                while len(self._entries) > max(self.maxsize, 0):
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            if ttl is not ...:
+                self.ttl = ttl
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
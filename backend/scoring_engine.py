@@ -0,0 +1,553 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ──────────────────────────────────────────────
+# COLUMNAR SCORING ENGINE
+# Built once in _load_and_cache. Every per-movie signal is computed with
+# array operations instead of walking the table row by row.
+# ──────────────────────────────────────────────
+
+# Composite weights of the six signals
+W_COSINE = 0.35
+W_INDUSTRY = 0.20
+W_VIBE = 0.15
+W_SKILL_DEPTH = 0.15
+W_STAGE = 0.10
+W_EDU = 0.05
+
+# Title / summary words that mark a title as a web series
+SERIES_KEYWORDS = ["series", "season", "episode", "part ", "vol ", "miniseries"]
+
+
+def mentions_series(title, summary):
+    """Content-type heuristic: True for a "Web Series", False for a "Movie"."""
+    title, summary = str(title).lower(), str(summary).lower()
+    return any(kw in title or kw in summary for kw in SERIES_KEYWORDS)
+
+
+class FactorizedColumn:
+    """A lowercased text column stored as (unique values, integer codes).
+
+    The catalog only has a few dozen distinct industry / career_stage /
+    career_skills strings, so a substring test runs once per distinct value
+    and is broadcast back to every row with a single gather."""
+
+    def __init__(self, uniques, codes):
+        self.uniques = list(uniques)
+        self.codes = codes
+
+    @classmethod
+    def from_values(cls, values):
+        lowered = [str(v).lower() for v in values]
+        index = {}
+        codes = np.empty(len(lowered), dtype=np.int32)
+        for i, v in enumerate(lowered):
+            code = index.get(v)
+            if code is None:
+                code = index[v] = len(index)
+            codes[i] = code
+        return cls(index, codes)
+
+    def contains(self, needle):
+        """Boolean mask of rows whose value contains `needle`."""
+        hits = np.fromiter((needle in u for u in self.uniques), dtype=bool, count=len(self.uniques))
+        return hits[self.codes]
+
+    def map(self, fn, dtype=np.float64):
+        """Apply `fn` to every distinct value and broadcast the results to all rows."""
+        values = np.fromiter((fn(u) for u in self.uniques), dtype=dtype, count=len(self.uniques))
+        return values[self.codes]
+
+    def __getitem__(self, row):
+        return self.uniques[self.codes[row]]
+
+
+class TextColumn:
+    """A lowercased free-text column (mostly unique values).
+
+    Substring masks are memoized per needle: the vibe genres form a small,
+    fixed vocabulary, so each mask is computed once per process. `values`
+    may be any sequence, e.g. strings packed in a memory-mapped index."""
+
+    def __init__(self, values):
+        self.values = values
+        self._masks = {}
+
+    @classmethod
+    def from_values(cls, values):
+        return cls([str(v).lower() for v in values])
+
+    def contains(self, needle):
+        mask = self._masks.get(needle)
+        if mask is None:
+            mask = np.fromiter((needle in v for v in self.values), dtype=bool, count=len(self.values))
+            mask.flags.writeable = False
+            self._masks[needle] = mask
+        return mask
+
+    def __getitem__(self, row):
+        return self.values[row]
+
+    def masks(self):
+        return list(self._masks.values())
+
+    def memoized(self):
+        """(needles, stacked masks) computed so far, for the index artifact."""
+        needles = list(self._masks)
+        if not needles:
+            return needles, np.zeros((0, len(self.values)), dtype=bool)
+        return needles, np.stack([self._masks[n] for n in needles])
+
+    def seed(self, needles, masks):
+        """Install masks computed by an earlier process."""
+        for needle, mask in zip(needles, masks):
+            mask = np.asarray(mask, dtype=bool)
+            mask.flags.writeable = False
+            self._masks[needle] = mask
+
+
+class SignalTable:
+    """Ready-made per-category signal vectors.
+
+    Values precomputed at warm time are pinned; anything else is memoized
+    on first use in a bounded LRU."""
+
+    def __init__(self, build, maxsize=256):
+        self._build = build
+        self._pinned = {}
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+
+    def pin(self, key, table=None):
+        """Precompute (or install a persisted) vector that is never evicted."""
+        if key in self._pinned:
+            return
+        if table is None:
+            table = self._build(*key)
+        self._pinned[key] = self._freeze(table)
+
+    def pinned_items(self):
+        """(keys, stacked vectors) of the pinned entries, for the index artifact."""
+        keys = list(self._pinned)
+        if not keys:
+            return keys, np.zeros((0, 0))
+        return keys, np.stack([self._pinned[k] for k in keys])
+
+    def get(self, key):
+        table = self._pinned.get(key)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._lru.get(key)
+            if table is not None:
+                self._lru.move_to_end(key)
+                return table
+        table = self._freeze(self._build(*key))
+        with self._lock:
+            self._lru[key] = table
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return table
+
+    def items(self):
+        """Snapshot of every (key, vector) currently held, pinned or cached."""
+        with self._lock:
+            return list(self._pinned.items()) + list(self._lru.items())
+
+    def __len__(self):
+        return len(self._pinned) + len(self._lru)
+
+    @staticmethod
+    def _freeze(table):
+        table.flags.writeable = False
+        return table
+
+
+# ──────────────────────────────────────────────
+# INVERTED SKILL INDEX
+# career_skills segment -> sorted posting list of movie row ids.
+# Answers "which movies contain this user skill" by merging posting lists
+# instead of substring-testing every movie's career_skills string.
+# ──────────────────────────────────────────────
+
+
+class SkillIndex:
+    """Posting lists over the comma-separated segments of career_skills.
+
+    Keeps the exact semantics of `skill in career_skills.lower()`: segments
+    are stored as-is (lowercased, surrounding spaces kept), and a needle
+    without a comma can only match inside a single segment, so the rows
+    containing it are the union of the postings of every segment that
+    contains it. Needles with a comma fall back to a scan of the distinct
+    career_skills strings."""
+
+    def __init__(self, column, maxsize=4096):
+        self.size = len(column.codes)
+        self._column = column
+        rows_by_segment = {}
+        order = np.argsort(column.codes, kind="stable")
+        bounds = np.searchsorted(column.codes[order], np.arange(len(column.uniques) + 1))
+        for code, value in enumerate(column.uniques):
+            rows = order[bounds[code]:bounds[code + 1]]
+            for segment in set(value.split(",")):
+                rows_by_segment.setdefault(segment, []).append(rows)
+        self.segments = list(rows_by_segment)
+        self.postings = [np.sort(np.concatenate(parts)).astype(np.int32) for parts in rows_by_segment.values()]
+        self._lookup = SignalTable(self._rows_containing, maxsize=maxsize)
+
+    def _rows_containing(self, needle):
+        if "," in needle:
+            return np.flatnonzero(self._column.contains(needle)).astype(np.int32)
+        matches = [self.postings[i] for i, segment in enumerate(self.segments) if needle in segment]
+        if not matches:
+            return np.zeros(0, dtype=np.int32)
+        if len(matches) == 1:
+            return matches[0]
+        return np.unique(np.concatenate(matches))
+
+    def posting(self, skill):
+        """Sorted row ids whose career_skills contain `skill` (already lowercased)."""
+        return self._lookup.get((skill,))
+
+    def overlap_counts(self, skills):
+        """Per-movie count of `skills` found in career_skills."""
+        postings = [self.posting(s) for s in skills]
+        if not postings:
+            return np.zeros(self.size, dtype=np.int64)
+        return np.bincount(np.concatenate(postings), minlength=self.size)
+
+    def candidates(self, skills):
+        """Rows matching at least one of `skills`."""
+        postings = [self.posting(s) for s in skills]
+        if not postings:
+            return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(postings))
+
+    def contains(self, skill, row):
+        posting = self.posting(skill)
+        i = np.searchsorted(posting, row)
+        return i < len(posting) and posting[i] == row
+
+
+# ──────────────────────────────────────────────
+# RESULT COLUMNS & TOP-N SELECTION
+# ──────────────────────────────────────────────
+
+
+class DisplayColumns:
+    """Original-case values needed to render a recommendation, one sequence
+    per column: lists of the strings sqlite returned after a fit, or packed
+    strings in a memory-mapped index artifact."""
+
+    FIELDS = ("title", "career_skills", "industry", "summary")
+
+    def __init__(self, ids, title, career_skills, industry, summary):
+        self.ids = ids
+        self.title = title
+        self.career_skills = career_skills
+        self.industry = industry
+        self.summary = summary
+        self._positions = None
+
+    def position(self, movie_id):
+        """Row of `movie_id`, or None if it is not in the catalog."""
+        if self._positions is None:
+            self._positions = {movie: pos for pos, movie in enumerate(np.asarray(self.ids).tolist())}
+        return self._positions.get(int(movie_id))
+
+    def strings(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def row(self, pos):
+        return {
+            "id": int(self.ids[pos]),
+            "title": self.title[pos],
+            "career_skills": self.career_skills[pos],
+            "industry": self.industry[pos],
+            "summary": self.summary[pos],
+        }
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first.
+
+    argpartition selects the k winners without sorting the whole array; only
+    those k are sorted. Ties are broken by ascending row position, including
+    at the k-th place, so the order is deterministic."""
+    n = scores.shape[0]
+    k = min(max(k, 0), n)
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(n)
+    return selected[np.lexsort((selected, -scores[selected]))]
+
+
+class LazyRanking:
+    """The full rank order of `scores` (same order as top_k), sorted only
+    as far as it has been read: each extension runs top_k over a doubled
+    prefix. `positions` maps score indices to catalog rows (None: same)."""
+
+    def __init__(self, scores, positions=None, first=16):
+        self.scores = scores
+        self.positions = positions
+        self._order = top_k(scores, first)
+
+    def __len__(self):
+        return self.scores.shape[0]
+
+    def page(self, start, stop):
+        """(catalog rows, scores) of ranks start..stop-1."""
+        stop = min(stop, len(self))
+        order = self._order
+        if stop > len(order):
+            # top_k breaks ties by position, so a longer prefix extends the shorter one
+            order = self._order = top_k(self.scores, max(stop, 2 * len(order)))
+        idx = order[start:stop]
+        return (idx if self.positions is None else self.positions[idx]), self.scores[idx]
+
+
+# ──────────────────────────────────────────────
+# SIGNAL ENGINE
+# ──────────────────────────────────────────────
+
+
+class ScoringEngine:
+    """Pre-lowercased column arrays for the five non-TF-IDF signals.
+
+    Produces exactly the same per-movie scores as the original row loops
+    in generate_recommendations."""
+
+    FACTORIZED = ("industry", "career_stage", "career_skills")
+    TABLES = ("vibe_table", "industry_table", "stage_table")
+
+    def __init__(self, industry, career_stage, career_skills, vibe_text, edu_scores, display):
+        self.size = len(edu_scores)
+        self.display = display
+        self.industry = industry
+        self.career_stage = career_stage
+        self.career_skills = career_skills
+        self.vibe_text = vibe_text
+        self.edu_scores = edu_scores
+        self.skills = SkillIndex(career_skills)
+        self._stage_all = self.career_stage.contains("all")
+        self.vibe_genres = {}
+        self.industry_table = SignalTable(self.industry_scores)
+        self.stage_table = SignalTable(self.stage_scores)
+        self.vibe_table = SignalTable(self._vibe_scores_for)
+        self.prior_orders = SignalTable(self._prior_order, maxsize=64)
+        # Facet masks for filtered queries, see facet_mask()
+        self.industry_masks = SignalTable(self.industry.contains)
+        self._series = None
+
+    @classmethod
+    def from_records(cls, columns, rows):
+        """Build every column from sqlite rows (column names + tuples).
+        NULL text counts as "" and a NULL educational_value_score as 5."""
+        position = {name: i for i, name in enumerate(columns)}
+
+        def raw(name):
+            i = position[name]
+            return [row[i] for row in rows]
+
+        def text(name):
+            return ["" if value is None else value for value in raw(name)]
+
+        edu = np.array([5 if v is None else v for v in raw("educational_value_score")], dtype=np.float64)
+        return cls(
+            FactorizedColumn.from_values(text("industry")),
+            FactorizedColumn.from_values(text("career_stage")),
+            FactorizedColumn.from_values(text("career_skills")),
+            # Vibe genres are searched in summary + career_skills
+            TextColumn.from_values([s + " " + k for s, k in zip(text("summary"), text("career_skills"))]),
+            np.minimum(edu / 10.0, 1.0),
+            DisplayColumns(np.array(raw("id"), dtype=np.int64), *(raw(name) for name in DisplayColumns.FIELDS)),
+        )
+
+    @classmethod
+    def from_arrays(cls, columns, arrays, vibe_text, display):
+        """Rebuild from a persisted index (see to_arrays). The arrays are used
+        as given, so memory-mapped inputs stay shared between processes."""
+        factorized = [
+            FactorizedColumn(columns[name], np.asarray(arrays[name + "_codes"]))
+            for name in cls.FACTORIZED
+        ]
+        if "genre_masks" in arrays:
+            vibe_text.seed(columns["genres"], arrays["genre_masks"])
+        engine = cls(*factorized, vibe_text, np.asarray(arrays["edu_scores"]), display)
+        if "series_mask" in arrays:
+            engine._series = np.asarray(arrays["series_mask"], dtype=bool)
+        for name in cls.TABLES:
+            if name in arrays:
+                table = getattr(engine, name)
+                for key, vector in zip(columns[name], arrays[name]):
+                    table.pin(tuple(key), np.asarray(vector))
+        return engine
+
+    def to_arrays(self):
+        """(JSON-able column metadata, NumPy arrays, string columns) for the index artifact."""
+        columns = {name: getattr(self, name).uniques for name in self.FACTORIZED}
+        arrays = {name + "_codes": getattr(self, name).codes for name in self.FACTORIZED}
+        arrays["edu_scores"] = self.edu_scores
+        arrays["ids"] = self.display.ids
+        arrays["series_mask"] = self.series_mask()
+        columns["genres"], arrays["genre_masks"] = self.vibe_text.memoized()
+        for name in self.TABLES:
+            keys, vectors = getattr(self, name).pinned_items()
+            if keys:
+                columns[name], arrays[name] = [list(k) for k in keys], vectors
+        strings = self.display.strings()
+        strings["vibe_text"] = self.vibe_text.values
+        return columns, arrays, strings
+
+    def slice(self, start, stop):
+        """Engine over rows start..stop-1 only (one shard of the catalog).
+
+        Codes, scores, strings and masks already computed or persisted are
+        narrowed to the range, as views where the source allows it; the
+        skill index and any new table are built over the slice alone."""
+        rows = slice(start, stop)
+        vibe_text = TextColumn(self.vibe_text.values[rows])
+        needles, masks = self.vibe_text.memoized()
+        vibe_text.seed(needles, masks[:, rows])
+        display = self.display
+        engine = ScoringEngine(
+            *(FactorizedColumn(getattr(self, name).uniques, getattr(self, name).codes[rows]) for name in self.FACTORIZED),
+            vibe_text,
+            self.edu_scores[rows],
+            DisplayColumns(display.ids[rows], *(getattr(display, name)[rows] for name in DisplayColumns.FIELDS)),
+        )
+        engine.vibe_genres = self.vibe_genres
+        for name in self.TABLES:
+            for key, vector in getattr(self, name).items():
+                getattr(engine, name).pin(key, vector[rows])
+        if self._series is not None:
+            engine._series = self._series[rows]
+        return engine
+
+    def arrays(self):
+        """Every NumPy array the engine holds, for memory accounting."""
+        found = [col.codes for col in (self.industry, self.career_stage, self.career_skills)]
+        found += [self.edu_scores, self.display.ids]
+        if self._series is not None:
+            found.append(self._series)
+        found += [mask for _, mask in self.industry_masks.items()]
+        found += self.vibe_text.masks()
+        found += self.skills.postings
+        for name in self.TABLES:
+            found += [table for _, table in getattr(self, name).items()]
+        for column in [self.vibe_text.values] + [getattr(self.display, f) for f in DisplayColumns.FIELDS]:
+            if hasattr(column, "blob"):
+                found += [column.blob, column.offsets]
+        return found
+
+    def precompute_tables(self, vibe_genres, industries, stages):
+        """Pin signal vectors for every known vibe, industry and career stage.
+        Industry pairs with a secondary industry and unseen values are
+        memoized lazily by the tables themselves."""
+        self.vibe_genres = vibe_genres
+        for vibe in vibe_genres:
+            self.vibe_table.pin((vibe,))
+        for industry in industries:
+            self.industry_table.pin((industry.lower(), ""))
+        for stage in stages:
+            self.stage_table.pin((stage.lower(),))
+
+    def series_mask(self):
+        """Rows the content-type heuristic marks as a web series, scanned
+        once per catalog (and persisted with the index artifact)."""
+        if self._series is None:
+            display = self.display
+            mask = np.fromiter(
+                (mentions_series(display.title[i], display.summary[i]) for i in range(self.size)),
+                dtype=bool, count=self.size,
+            )
+            mask.flags.writeable = False
+            self._series = mask
+        return self._series
+
+    def is_series(self, row):
+        if self._series is not None:
+            return bool(self._series[row])
+        # Throwaway engines (fts5 candidates) only test the rows they render
+        return mentions_series(self.display.title[row], self.display.summary[row])
+
+    def facet_mask(self, industries=(), series=None, min_edu=None, exclude_ids=()):
+        """Boolean mask of the rows a filtered query may return.
+
+        industries: keep rows whose industry contains any of the names
+        (case-insensitive, like signal 2); series: True keeps web series,
+        False movies; min_edu: minimum educational_value_score on its 0–10
+        scale; exclude_ids: movie ids to drop. Each facet value's mask is
+        built once and memoized, so a query only ANDs/ORs boolean arrays."""
+        allowed = np.ones(self.size, dtype=bool)
+        if industries:
+            allowed &= np.logical_or.reduce([self.industry_masks.get((name.lower(),)) for name in industries])
+        if series is not None:
+            allowed &= self.series_mask() if series else ~self.series_mask()
+        if min_edu is not None:
+            allowed &= self.edu_scores >= min_edu / 10.0
+        for movie_id in exclude_ids:
+            pos = self.display.position(movie_id)
+            if pos is not None:
+                allowed[pos] = False
+        return allowed
+
+    def industry_scores(self, industry_lower, secondary_ind_lower):
+        """Signal 2: 1.0 exact industry, 0.7 secondary industry, 0.3 any shared word."""
+        words = industry_lower.split()
+
+        def score(movie_industry):
+            if industry_lower and industry_lower in movie_industry:
+                return 1.0
+            if secondary_ind_lower and secondary_ind_lower in movie_industry:
+                return 0.7
+            if any(word in movie_industry for word in words):
+                return 0.3
+            return 0.0
+
+        return self.industry.map(score)
+
+    def stage_scores(self, stage_lower):
+        """Signal 3: 1.0 on a career stage match, 0.5 for titles aimed at all levels."""
+        if stage_lower:
+            exact = self.career_stage.contains(stage_lower)
+        else:
+            exact = np.zeros(self.size, dtype=bool)
+        return np.where(exact, 1.0, np.where(self._stage_all, 0.5, 0.0))
+
+    def _prior_order(self, industry_lower, secondary_ind_lower, stage_lower, vibe):
+        """Rows by descending composite for movies with no TF-IDF or skill
+        overlap, whose score is then fixed by industry, vibe, stage and edu."""
+        prior = (
+            W_INDUSTRY * self.industry_table.get((industry_lower, secondary_ind_lower)) +
+            W_VIBE * self.vibe_table.get((vibe,)) +
+            W_STAGE * self.stage_table.get((stage_lower,)) +
+            W_EDU * self.edu_scores
+        )
+        return np.argsort(-prior, kind="stable").astype(np.int32)
+
+    def _vibe_scores_for(self, vibe):
+        return self.vibe_scores(self.vibe_genres.get(vibe, []))
+
+    def vibe_scores(self, relevant_genres):
+        """Signal 4: graduated genre hits in summary + career_skills, capped at 1.0."""
+        hits = np.zeros(self.size, dtype=np.int64)
+        for genre in relevant_genres:
+            hits += self.vibe_text.contains(genre)
+        if not relevant_genres:
+            return np.zeros(self.size)
+        return np.minimum(hits / 3.0, 1.0)
+
+    def skill_depth_scores(self, all_user_skills):
+        """Signal 5: fraction of the user's skills found in the movie's career_skills."""
+        overlap = self.skills.overlap_counts(all_user_skills)
+        return np.minimum(overlap / max(len(all_user_skills), 1), 1.0)
@@ -0,0 +1,102 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# ──────────────────────────────────────────────
+# SHARDED WORKER POOL
+# A large catalog is split into contiguous row ranges, each owned by one
+# persistent worker process that loads the state for its range once and
+# keeps it. A request is fanned out to every shard at the same time and
+# the per-shard results are returned to the caller to merge.
+# Workers are spawned rather than forked: the serving process runs
+# background threads (catalog refresher) that a fork would copy mid-state.
+# A worker that dies (OOM killer, crash) is replaced on the next request
+# that reaches its shard, and that shard's part of the request is retried
+# once.
+# ──────────────────────────────────────────────
+
+
+def shard_bounds(size, shards):
+    """(start, stop) row ranges splitting `size` rows into at most `shards` near-equal parts."""
+    shards = max(1, min(shards, size))
+    edges = np.linspace(0, size, shards + 1).round().astype(np.int64).tolist()
+    return list(zip(edges[:-1], edges[1:]))
+
+
+class ShardPool:
+    """One single-worker process pool per shard, so every shard's state lives
+    in exactly one process.
+
+    `load(start, stop)` builds a shard's state inside its worker and
+    `score(state, *args)` runs there per request; both must be picklable
+    (module-level functions or functools.partial objects over them)."""
+
+    def __init__(self, bounds, load, score):
+        self.bounds = list(bounds)
+        self._load = load
+        self._score = score
+        self._context = multiprocessing.get_context("spawn")
+        self._respawn_lock = threading.Lock()
+        self.respawns = 0
+        self._executors = [self._spawn(start, stop) for start, stop in self.bounds]
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def map(self, *args):
+        """score(state, *args) on every shard concurrently, results in shard order."""
+        futures = [self._submit(i, args) for i in range(len(self._executors))]
+        results = []
+        for i, (executor, future) in enumerate(futures):
+            try:
+                results.append(future.result())
+            except BrokenProcessPool:
+                # The worker died mid-request; retry on a fresh one (a second
+                # death, e.g. a request that crashes it every time, propagates)
+                results.append(self._respawn(i, executor).submit(_run_worker, self._score, args).result())
+        return results
+
+    def _spawn(self, start, stop):
+        return ProcessPoolExecutor(
+            max_workers=1, mp_context=self._context, initializer=_init_worker, initargs=(self._load, start, stop)
+        )
+
+    def _submit(self, i, args):
+        """(executor, future) of shard i's part, replacing a worker found dead."""
+        executor = self._executors[i]
+        try:
+            return executor, executor.submit(_run_worker, self._score, args)
+        except BrokenProcessPool:
+            executor = self._respawn(i, executor)
+            return executor, executor.submit(_run_worker, self._score, args)
+
+    def _respawn(self, i, broken):
+        """Replace shard i's executor if it is still `broken`; the current one."""
+        with self._respawn_lock:
+            if self._executors[i] is broken:
+                print(f"[Recommender] Shard {i} worker died; starting a new one")
+                broken.shutdown(wait=False)
+                self._executors[i] = self._spawn(*self.bounds[i])
+                self.respawns += 1
+            return self._executors[i]
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+
+
+# ── Worker side ──
+
+_state = None
+
+
+def _init_worker(load, start, stop):
+    global _state
+    _state = load(start, stop)
+
+
+def _run_worker(score, args):
+    return score(_state, *args)
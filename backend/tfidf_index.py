@@ -0,0 +1,243 @@
+import hashlib
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+
+# ──────────────────────────────────────────────
+# INCREMENTAL TF-IDF INDEX
+# Keeps the raw term counts next to the weighted matrix, so rows can be
+# added, replaced or deleted by movie id without refitting the vocabulary.
+# Only changed documents are analyzed; IDF is recomputed from the
+# document-frequency counts. A fit is identical to TfidfVectorizer bit for
+# bit: same analyzer, same IDF formula, and the weighting and L2 norm are
+# TfidfTransformer's own, applied to the counts in the same storage order.
+# scikit-learn is only imported to fit or patch; an index loaded from its
+# arrays serves without it.
+# ──────────────────────────────────────────────
+
+
+def doc_hashes(docs):
+    """Stable 64-bit fingerprint per document, used to spot edited rows."""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(d.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+         for d in docs],
+        dtype=np.uint64,
+    )
+
+
+# TfidfVectorizer parameters that shape the weighting rather than the counts
+WEIGHTING_PARAMS = ("norm", "use_idf", "smooth_idf", "sublinear_tf")
+
+
+class TfidfIndex:
+    """Immutable TF-IDF matrix over a fixed vocabulary, patchable by id.
+
+    Every update returns a new index. `drift` is the share of tokens that
+    changed documents brought in but the vocabulary could not represent,
+    relative to the token count at the last full fit; once it passes a
+    threshold the caller should refit."""
+
+    def __init__(self, params, vocabulary, ids, hashes, counts, fit_tokens, oov_tokens=0, idf=None, matrix=None,
+                 stop_words=None, cosine=None, term_order=None):
+        self.params = params
+        self.vocabulary = vocabulary
+        self.ids = ids
+        self.hashes = hashes
+        self.counts = counts
+        self.fit_tokens = fit_tokens
+        self.oov_tokens = oov_tokens
+        self.idf = self._idf(counts, params.get("smooth_idf", True)) if idf is None else idf
+        self.matrix = self._weight(counts, self.idf) if matrix is None else matrix
+        self._stop_words = stop_words
+        self._cosine = cosine
+        self._analyzer = None
+        self.term_order = self._term_order(counts) if term_order is None else term_order
+
+    @classmethod
+    def fit(cls, params, ids, docs):
+        """Full fit, equivalent to TfidfVectorizer(**params).fit_transform(docs)."""
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        if not params.get("use_idf", True) or params.get("norm", "l2") != "l2":
+            raise ValueError("TfidfIndex needs use_idf=True and norm='l2' (queries are cosine-scored)")
+        count_params = {k: v for k, v in params.items() if k not in WEIGHTING_PARAMS}
+        counter = CountVectorizer(dtype=np.float64, **count_params)
+        counts = sp.csr_matrix(counter.fit_transform(docs))
+        return cls(
+            params, counter.vocabulary_, np.asarray(ids, dtype=np.int64), doc_hashes(docs), counts,
+            fit_tokens=int(counts.data.sum()),
+        )
+
+    @classmethod
+    def from_arrays(cls, params, vocabulary, state, arrays, idf, matrix):
+        """Rebuild from a persisted index. The counts share the matrix's
+        sparsity pattern, so only their data array is stored."""
+        counts = sp.csr_matrix(
+            (arrays["tfidf_counts"], matrix.indices, matrix.indptr), shape=matrix.shape, copy=False
+        )
+        cosine = sp.csr_matrix(
+            (arrays["cosine_data"], matrix.indices, matrix.indptr), shape=matrix.shape, copy=False
+        )
+        return cls(
+            params, vocabulary, arrays["ids"], arrays["doc_hashes"], counts,
+            state["fit_tokens"], state["oov_tokens"], idf=idf, matrix=matrix,
+            stop_words=state["stop_words"], cosine=cosine, term_order=arrays["term_order"],
+        )
+
+    def to_arrays(self):
+        """(JSON-able state, NumPy arrays) for the index artifact."""
+        state = {"fit_tokens": self.fit_tokens, "oov_tokens": self.oov_tokens, "stop_words": self.stop_words()}
+        arrays = {
+            "tfidf_counts": self.counts.data.astype(np.int32),
+            "doc_hashes": self.hashes,
+            "cosine_data": self.cosine_matrix().data,
+            "term_order": self.term_order,
+        }
+        return state, arrays
+
+    def stop_words(self):
+        """Sorted stop word list of the analyzer, so queries can be encoded
+        without scikit-learn (see QueryEncoder)."""
+        if self._stop_words is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            self._stop_words = sorted(TfidfVectorizer(**self.params).get_stop_words() or ())
+        return self._stop_words
+
+    def cosine_matrix(self):
+        """`matrix` renormalized the way cosine_similarity renormalizes its
+        input. The second pass moves some weights by an ulp, so a plain dot
+        product with this matrix reproduces cosine_similarity exactly."""
+        if self._cosine is None:
+            from sklearn.preprocessing import normalize
+
+            self._cosine = normalize(self.matrix, norm="l2", copy=True)
+        return self._cosine
+
+    @property
+    def drift(self):
+        return self.oov_tokens / max(self.fit_tokens, 1)
+
+    # ── Updates (each returns a new index) ──
+
+    def add(self, ids, docs):
+        ids = np.asarray(ids, dtype=np.int64)
+        if np.isin(ids, self.ids).any():
+            raise ValueError("add() got ids that are already indexed; use update()")
+        rows = np.concatenate([np.arange(len(self.ids)), np.full(len(ids), -1)])
+        return self._patch(rows, np.concatenate([self.ids, ids]), docs)
+
+    def update(self, ids, docs):
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = self._positions(ids)
+        order = np.argsort(positions)
+        rows = np.arange(len(self.ids))
+        rows[positions] = -1
+        return self._patch(rows, self.ids, [docs[i] for i in order])
+
+    def delete(self, ids):
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[self._positions(np.asarray(ids, dtype=np.int64))] = False
+        rows = np.flatnonzero(keep)
+        return self._patch(rows, self.ids[rows], [])
+
+    def sync(self, ids, docs):
+        """Index for a full (ids, docs) table, in that row order. Rows whose
+        id and text are unchanged are reused; returns self if nothing changed."""
+        ids = np.asarray(ids, dtype=np.int64)
+        hashes = doc_hashes(docs)
+        order = np.argsort(self.ids, kind="stable")
+        pos = np.minimum(np.searchsorted(self.ids[order], ids), len(order) - 1)
+        rows = order[pos]
+        reuse = (self.ids[rows] == ids) & (self.hashes[rows] == hashes)
+        if reuse.all() and len(ids) == len(self.ids):
+            return self
+        rows = np.where(reuse, rows, -1)
+        fresh = np.flatnonzero(~reuse)
+        return self._patch(rows, ids, [docs[i] for i in fresh], hashes)
+
+    # ── Internals ──
+
+    def _positions(self, ids):
+        order = np.argsort(self.ids, kind="stable")
+        pos = np.searchsorted(self.ids[order], ids)
+        found = pos < len(order)
+        found[found] = self.ids[order[pos[found]]] == ids[found]
+        if not found.all():
+            raise KeyError(f"ids not in the index: {ids[~found].tolist()}")
+        return order[pos]
+
+    def _patch(self, rows, ids, fresh_docs, hashes=None):
+        """Assemble a new index: row i is old row rows[i], or the next
+        freshly analyzed document where rows[i] < 0."""
+        fresh_counts, oov = self._analyze(fresh_docs)
+        fresh_at = np.cumsum(rows < 0) - 1
+        take = np.where(rows >= 0, rows, self.counts.shape[0] + fresh_at)
+        stacked = sp.vstack([sp.csr_matrix(self.counts, dtype=np.float64), fresh_counts], format="csr")
+        counts = stacked[take]
+        if hashes is None:
+            hashes = self.hashes[np.maximum(rows, 0)]
+            hashes[rows < 0] = doc_hashes(fresh_docs)
+        return TfidfIndex(
+            self.params, self.vocabulary, ids, hashes, counts, self.fit_tokens, self.oov_tokens + oov,
+            stop_words=self._stop_words, term_order=self.term_order,
+        )
+
+    def _analyze(self, docs):
+        """Count matrix of `docs` over the fixed vocabulary, plus the number
+        of tokens that fell outside it."""
+        if self._analyzer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            self._analyzer = TfidfVectorizer(**self.params).build_analyzer()
+        indptr, indices, data = [0], [], []
+        oov = 0
+        for doc in docs:
+            row = Counter()
+            for token in self._analyzer(doc):
+                col = self.vocabulary.get(token)
+                if col is None:
+                    oov += 1
+                else:
+                    row[col] += 1
+            cols = sorted(row, key=self.term_order.__getitem__)
+            indices.extend(cols)
+            data.extend(row[c] for c in cols)
+            indptr.append(len(indices))
+        counts = sp.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(docs), len(self.vocabulary)),
+        )
+        return counts, oov
+
+    @staticmethod
+    def _term_order(counts):
+        """Rank of each column in the order CountVectorizer first met its
+        term, which is the order it stores a row's entries in. Patched rows
+        keep it: the L2 norm sums in storage order, so any other order
+        could move a weight by an ulp."""
+        first = np.full(counts.shape[1], counts.nnz, dtype=np.int64)
+        np.minimum.at(first, counts.indices, np.arange(counts.nnz))
+        order = np.empty(counts.shape[1], dtype=np.int32)
+        order[np.argsort(first, kind="stable")] = np.arange(counts.shape[1], dtype=np.int32)
+        return order
+
+    @staticmethod
+    def _idf(counts, smooth_idf=True):
+        # Same arithmetic as TfidfTransformer.fit
+        df = np.bincount(counts.indices, minlength=counts.shape[1]).astype(np.float64)
+        df += int(smooth_idf)
+        idf = np.full_like(df, fill_value=counts.shape[0] + int(smooth_idf), dtype=np.float64)
+        idf /= df
+        np.log(idf, out=idf)
+        idf += 1.0
+        return idf
+
+    def _weight(self, counts, idf):
+        """TfidfTransformer.transform with our IDF, honouring sublinear_tf."""
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        transformer = TfidfTransformer(**{k: v for k, v in self.params.items() if k in WEIGHTING_PARAMS})
+        transformer.idf_ = idf
+        return sp.csr_matrix(transformer.transform(sp.csr_matrix(counts, dtype=np.float64)))
@@ -0,0 +1,20 @@
+"""Benchmarks for backend/recommender.py.
+
+Replays the synthetic profile corpora exported from test_500_profiles.mjs
+and audit_700_profiles.mjs (see fixtures/) and reports cold start,
+per-request latency percentiles, throughput at several thread counts and
+peak RSS, optionally on a synthetically scaled catalog:
+
+    python -m benchmarks                          # 1x catalog, both corpora
+    python -m benchmarks --scale 1 10 --json bench.json
+    python -m benchmarks --baseline bench.json    # compare against a saved run
+    python -m benchmarks.startup                  # import / warm / first request per mode
+    python -m benchmarks.retrieval                # sparse vs LSA vs FTS5 recall and latency
+    python -m benchmarks.query_encoding           # per-field query encoder vs transform()
+    python -m benchmarks.sharding --scale 20      # sharded scoring throughput per worker count
+
+Regenerate the fixtures with:
+
+    node test_500_profiles.mjs --export-profiles benchmarks/fixtures/profiles_500.json
+    node audit_700_profiles.mjs --export-profiles benchmarks/fixtures/profiles_700.json
+"""
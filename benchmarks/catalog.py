@@ -0,0 +1,47 @@
+import os
+import shutil
+import sqlite3
+
+# ──────────────────────────────────────────────
+# SYNTHETIC CATALOG SCALING
+# A scaled catalog is the real movies table repeated `factor` times. Each
+# copy gets fresh ids and a numbered title, so row counts, postings and
+# matrix sizes grow linearly while the text keeps its real distribution.
+# ──────────────────────────────────────────────
+
+
+def make_catalog(src_db, workdir, factor=1):
+    """Copy `src_db` into `workdir` (scaled by `factor`) and return the new path.
+
+    The copy lives in its own directory, so its index artifact never touches
+    the one next to the real movies.db."""
+    os.makedirs(workdir, exist_ok=True)
+    dest = os.path.join(workdir, "movies.db")
+    if os.path.exists(dest):
+        os.remove(dest)
+    shutil.copyfile(src_db, dest)
+    if factor <= 1:
+        return dest
+
+    conn = sqlite3.connect(dest)
+    try:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(movies)")]
+        quoted = [f'"{name}"' for name in columns]
+        stride = conn.execute("SELECT MAX(id) FROM movies").fetchone()[0] + 1
+        for copy in range(1, int(factor)):
+            select = []
+            for name in columns:
+                if name == "id":
+                    select.append(f"id + {copy * stride}")
+                elif name == "title":
+                    select.append(f"title || ' #{copy + 1}'")
+                else:
+                    select.append(f'"{name}"')
+            conn.execute(
+                f"INSERT INTO movies ({', '.join(quoted)}) "
+                f"SELECT {', '.join(select)} FROM movies WHERE id < {stride}"
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return dest
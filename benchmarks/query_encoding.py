@@ -0,0 +1,96 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.runner import BACKEND_DIR, CORPORA, load_profiles, percentiles
+
+# ──────────────────────────────────────────────
+# QUERY ENCODING
+# Time to turn one profile into its TF-IDF query row, re-tokenizing the
+# joined query string as vectorizer.transform does vs the memoized
+# per-field encoder, and how far the "weighted" encoding moves the final
+# ranking:
+#   identical    encode / parity rows equal to a scikit-learn
+#                TfidfVectorizer fit on the catalog, bit for bit
+#   recall@N     weighted top-N overlap with the parity ranking
+#
+#     python -m benchmarks.query_encoding --repeat 5
+# ──────────────────────────────────────────────
+
+
+def _time(fn, items, repeat):
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            t = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - t) * 1000.0)
+    return percentiles(samples)
+
+
+def _ranking(recommender, profiles, top_n, encoding):
+    recommender.QUERY_ENCODING = encoding
+    return [[rec["id"] for rec in recommender.generate_recommendations(p, top_n, use_cache=False)] for p in profiles]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.query_encoding", description="Query encoding latency and parity.")
+    parser.add_argument("--corpora", nargs="+", choices=sorted(CORPORA), default=sorted(CORPORA))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, BACKEND_DIR)
+    import recommender
+
+    recommender.CATALOG_REFRESH_INTERVAL = None
+    recommender.warm_cache()
+    snapshot = recommender.get_snapshot()
+    encoder = snapshot.vectorizer
+    parsed = [recommender._parse_profile(p) for p in load_profiles(args.corpora)]
+    parsed = [p for p in parsed if p["query"].strip()]
+    weighted = [[(text, recommender.QUERY_FIELD_WEIGHTS[field]) for field, text in p["query_fields"]] for p in parsed]
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    reference = TfidfVectorizer(**recommender.TFIDF_PARAMS).fit(
+        recommender._catalog_docs(*recommender._read_catalog())[1]
+    )
+    identical = {"encode": 0, "parity": 0}
+    for p in parsed:
+        expected = reference.transform([p["query"]])
+        for name, (indices, data) in (
+            ("encode", encoder.encode(p["query"])),
+            ("parity", encoder.encode_parts(p["query_parts"])),
+        ):
+            identical[name] += np.array_equal(expected.indices, indices) and expected.data.tobytes() == data.tobytes()
+
+    rows = [
+        ("sklearn transform", lambda p: reference.transform([p["query"]])),
+        ("transform(query)", lambda p: encoder.transform([p["query"]])),
+        ("parity", lambda p: encoder.encode_parts(p["query_parts"])),
+    ]
+    print(f"\n── {len(parsed)} profiles, {snapshot.tfidf_matrix.shape[1]} features ──")
+    for name, count in identical.items():
+        print(f"  {name} rows identical to TfidfVectorizer: {count}/{len(parsed)}")
+    encoder._part.cache_clear()
+    cold = _time(lambda p: encoder.encode_parts(p["query_parts"]), parsed, 1)
+    print(f"  {'parity (cold cache)':22s} p50 {cold['p50'] * 1000:7.1f} us  p95 {cold['p95'] * 1000:7.1f} us")
+    for name, fn in rows:
+        latency = _time(fn, parsed, args.repeat)
+        print(f"  {name:22s} p50 {latency['p50'] * 1000:7.1f} us  p95 {latency['p95'] * 1000:7.1f} us")
+    latency = _time(encoder.encode_weighted, weighted, args.repeat)
+    print(f"  {'weighted':22s} p50 {latency['p50'] * 1000:7.1f} us  p95 {latency['p95'] * 1000:7.1f} us")
+
+    profiles = load_profiles(args.corpora)
+    parity = _ranking(recommender, profiles, args.top_n, "parity")
+    moved = _ranking(recommender, profiles, args.top_n, "weighted")
+    recall = np.mean([len(set(a) & set(b)) / len(a) if a else 1.0 for a, b in zip(parity, moved)])
+    print(f"  weighted recall@{args.top_n} vs parity {recall:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.catalog import make_catalog
+from benchmarks.runner import BACKEND_DIR, CORPORA, load_profiles, percentiles
+
+# ──────────────────────────────────────────────
+# SPARSE vs LSA vs FTS5 RETRIEVAL
+# Scores the profile corpora with the exact sparse cosine, with the dense
+# LSA embedding at several dimensionalities and with SQLite FTS5/bm25,
+# reporting how much of the exact ranking each recovers and what it costs
+# per request (on a copy of movies.db, which fts5 writes its table into):
+#   recall@N      final top-N overlap with the sparse ranking
+#   content@50    overlap of the 50 best pure content scores (LSA only)
+#
+#     python -m benchmarks.retrieval --components 128 256 384
+# ──────────────────────────────────────────────
+
+
+def _recall(expected, actual):
+    expected = set(expected)
+    return len(expected.intersection(actual)) / len(expected) if expected else 1.0
+
+
+def _content_top(recommender, snapshot, retrieval, profiles, k=50):
+    """Indices of the k best content scores per profile, ignoring every other signal."""
+    scorer = recommender._content_scorer(snapshot, retrieval)
+    tops = []
+    for profile in profiles:
+        query = recommender._query_row(snapshot.vectorizer, recommender._parse_profile(profile))
+        scores = np.asarray(scorer([query])[0], dtype=np.float64)
+        tops.append(np.argsort(-scores, kind="stable")[:k].tolist())
+    return tops
+
+
+def _run(recommender, profiles, top_n, retrieval):
+    rankings, latencies = [], []
+    for profile in profiles:
+        t = time.perf_counter()
+        recs = recommender.generate_recommendations(profile, top_n, use_cache=False, retrieval=retrieval)
+        latencies.append((time.perf_counter() - t) * 1000.0)
+        rankings.append([rec["id"] for rec in recs])
+    return rankings, percentiles(latencies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.retrieval", description="Sparse vs LSA retrieval quality and latency.")
+    parser.add_argument("--components", type=int, nargs="+", default=[128, 256, 384])
+    parser.add_argument("--corpora", nargs="+", choices=sorted(CORPORA), default=sorted(CORPORA))
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="moviefy-retrieval-") as workdir:
+        db_path = make_catalog(os.path.join(BACKEND_DIR, "movies.db"), workdir)
+        return _compare(db_path, args)
+
+
+def _compare(db_path, args):
+    sys.path.insert(0, BACKEND_DIR)
+    import recommender
+
+    recommender.DB_PATH = db_path
+    recommender.CATALOG_REFRESH_INTERVAL = None
+    recommender.warm_cache()
+    snapshot = recommender.get_snapshot()
+    profiles = load_profiles(args.corpora)
+
+    exact, exact_latency = _run(recommender, profiles, args.top_n, "sparse")
+    exact_content = _content_top(recommender, snapshot, "sparse", profiles)
+    print(f"\n── {len(profiles)} profiles, {snapshot.engine.size} movies, {snapshot.tfidf_matrix.shape[1]} features ──")
+    print(f"  sparse        p50 {exact_latency['p50']:6.2f} ms  p95 {exact_latency['p95']:6.2f} ms")
+
+    for k in args.components:
+        recommender.LSA_COMPONENTS = k
+        t = time.perf_counter()
+        snapshot.lsa.get(k)
+        build_s = time.perf_counter() - t
+        rankings, latency = _run(recommender, profiles, args.top_n, "lsa")
+        content = _content_top(recommender, snapshot, "lsa", profiles)
+        recall = np.mean([_recall(e, a) for e, a in zip(exact, rankings)])
+        content_recall = np.mean([_recall(e, a) for e, a in zip(exact_content, content)])
+        print(
+            f"  lsa k={k:<4d}    p50 {latency['p50']:6.2f} ms  p95 {latency['p95']:6.2f} ms  "
+            f"recall@{args.top_n} {recall:.3f}  content@50 {content_recall:.3f}  (load/build {build_s:.2f}s)"
+        )
+
+    t = time.perf_counter()
+    recommender._get_fts()
+    build_s = time.perf_counter() - t
+    rankings, latency = _run(recommender, profiles, args.top_n, "fts5")
+    recall = np.mean([_recall(e, a) for e, a in zip(exact, rankings)])
+    print(
+        f"  fts5          p50 {latency['p50']:6.2f} ms  p95 {latency['p95']:6.2f} ms  "
+        f"recall@{args.top_n} {recall:.3f}  {'':15s}(build {build_s:.2f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import benchmarks
+from benchmarks.catalog import make_catalog
+
+# ──────────────────────────────────────────────
+# RECOMMENDER BENCHMARK
+# Replays the exported 500/700 synthetic profiles against the real
+# backend/recommender.py. Every scenario runs in fresh child processes so
+# cold start and peak RSS are not polluted by earlier runs:
+#   1. cold start with no index artifact (full fit), then the full suite
+#   2. cold start attaching to the artifact the first child published
+# ──────────────────────────────────────────────
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CORPORA = {
+    "500": os.path.join(FIXTURES_DIR, "profiles_500.json"),
+    "700": os.path.join(FIXTURES_DIR, "profiles_700.json"),
+}
+
+# Relative slowdown (or throughput drop) that --baseline reports as a regression
+REGRESSION_TOLERANCE = 0.10
+
+
+def load_profiles(corpora):
+    profiles = []
+    for name in corpora:
+        with open(CORPORA[name], encoding="utf-8") as f:
+            profiles.extend(json.load(f))
+    return profiles
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset
+        except Exception:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentiles(samples_ms):
+    # NumPy is imported here, not at the top, so benchmarks.startup children
+    # import it only through the recommender they are timing
+    import numpy as np
+
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "mean": float(arr.mean()),
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+    }
+
+
+# ── Child process: one measured run against one catalog ──
+
+def run_child(db_path, corpora, top_n, threads, requests, cold_only):
+    t0 = time.perf_counter()
+    sys.path.insert(0, BACKEND_DIR)
+    import recommender
+    import_s = time.perf_counter() - t0
+
+    recommender.DB_PATH = db_path
+    recommender.CATALOG_REFRESH_INTERVAL = None
+    t1 = time.perf_counter()
+    recommender.warm_cache()
+    warm_s = time.perf_counter() - t1
+
+    snapshot = recommender.get_snapshot()
+    result = {
+        "catalog_size": snapshot.engine.size,
+        "features": snapshot.tfidf_matrix.shape[1],
+        "index_source": snapshot.source,
+        "cold_start_s": {"import": import_s, "warm": warm_s, "total": import_s + warm_s},
+    }
+    if cold_only:
+        result["peak_rss_bytes"] = peak_rss()
+        return result
+
+    profiles = load_profiles(corpora)
+
+    # ── Sequential latency, result cache off so every call is scored ──
+    latencies = []
+    rankings = []
+    for profile in profiles:
+        t = time.perf_counter()
+        recs = recommender.generate_recommendations(profile, top_n, use_cache=False)
+        latencies.append((time.perf_counter() - t) * 1000.0)
+        rankings.append([rec["id"] for rec in recs])
+    result["latency_ms"] = percentiles(latencies)
+    result["rankings"] = rankings
+
+    # ── Throughput at each concurrency level ──
+    work = [profiles[i % len(profiles)] for i in range(requests)]
+    result["throughput_rps"] = {}
+    for n in threads:
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            t = time.perf_counter()
+            list(pool.map(lambda p: recommender.generate_recommendations(p, top_n, use_cache=False), work))
+            elapsed = time.perf_counter() - t
+        result["throughput_rps"][str(n)] = len(work) / elapsed
+
+    result["peak_rss_bytes"] = peak_rss()
+    return result
+
+
+def _spawn(args, module="benchmarks.runner"):
+    """Run `module --child` in a fresh interpreter and return its JSON result."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out_path = f.name
+    try:
+        cmd = [sys.executable, "-m", module, "--child", "--out", out_path] + args
+        proc = subprocess.run(cmd, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"benchmark child failed:\n{proc.stdout}")
+        with open(out_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(out_path)
+
+
+def run_scenario(scale, corpora, top_n, threads, requests):
+    """Full measurement for one catalog scale factor."""
+    with tempfile.TemporaryDirectory(prefix=f"moviefy-bench-{scale}x-") as workdir:
+        db_path = make_catalog(os.path.join(BACKEND_DIR, "movies.db"), workdir, scale)
+        common = ["--db", db_path, "--top-n", str(top_n), "--corpora", *corpora]
+        run = _spawn(common + ["--threads", *map(str, threads), "--requests", str(requests)])
+        attach = _spawn(common + ["--cold-only"])
+    run["cold_start_s"] = {"fit": run["cold_start_s"], "artifact": attach["cold_start_s"]}
+    run["peak_rss_bytes"] = {"fit": run["peak_rss_bytes"], "artifact": attach["peak_rss_bytes"]}
+    return run
+
+
+# ── Reporting ──
+
+def _mb(value):
+    return "n/a" if value is None else f"{value / 2**20:.1f} MB"
+
+
+def print_report(report):
+    for scale, r in report["scenarios"].items():
+        print(f"\n── Catalog {scale} ({r['catalog_size']} movies, {r['features']} features) ──")
+        for mode in ("fit", "artifact"):
+            cold = r["cold_start_s"][mode]
+            print(f"  cold start ({mode:8s}) {cold['total']:.3f}s  (import {cold['import']:.3f}s, warm {cold['warm']:.3f}s)")
+        lat = r["latency_ms"]
+        print(f"  latency        p50 {lat['p50']:.2f} ms  p95 {lat['p95']:.2f} ms  p99 {lat['p99']:.2f} ms  max {lat['max']:.2f} ms")
+        for n, rps in r["throughput_rps"].items():
+            print(f"  throughput     {int(n):2d} threads  {rps:8.1f} req/s")
+        print(f"  peak RSS       fit {_mb(r['peak_rss_bytes']['fit'])}  artifact {_mb(r['peak_rss_bytes']['artifact'])}")
+
+
+def _metrics(scenario):
+    """Flat {name: (value, higher_is_better)} view used for baseline comparison."""
+    metrics = {
+        "cold_start_fit_s": (scenario["cold_start_s"]["fit"]["total"], False),
+        "cold_start_artifact_s": (scenario["cold_start_s"]["artifact"]["total"], False),
+    }
+    for name in ("p50", "p95", "p99"):
+        metrics[f"latency_{name}_ms"] = (scenario["latency_ms"][name], False)
+    for n, rps in scenario["throughput_rps"].items():
+        metrics[f"throughput_{n}t_rps"] = (rps, True)
+    if scenario["peak_rss_bytes"]["fit"] is not None:
+        metrics["peak_rss_fit_mb"] = (scenario["peak_rss_bytes"]["fit"] / 2**20, False)
+    return metrics
+
+
+def compare_to_baseline(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Print metric deltas and ranking differences; return the number of regressions."""
+    regressions = 0
+    for scale, current in report["scenarios"].items():
+        previous = baseline["scenarios"].get(scale)
+        if previous is None:
+            print(f"\n── {scale}: not in baseline ──")
+            continue
+        print(f"\n── {scale} vs baseline ──")
+        old_metrics = _metrics(previous)
+        for name, (value, higher_is_better) in _metrics(current).items():
+            if name not in old_metrics:
+                continue
+            old = old_metrics[name][0]
+            change = (value - old) / old if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > tolerance else ""
+            regressions += bool(flag)
+            print(f"  {name:24s} {old:10.3f} -> {value:10.3f}  ({change:+.1%}){flag}")
+        if current.get("rankings") and previous.get("rankings"):
+            if len(current["rankings"]) != len(previous["rankings"]):
+                print("  rankings: profile count differs, not compared")
+            else:
+                changed = sum(a != b for a, b in zip(current["rankings"], previous["rankings"]))
+                print(f"  rankings: {changed}/{len(current['rankings'])} profiles differ from baseline")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description=benchmarks.__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--scale", type=int, nargs="+", default=[1], help="catalog scale factors, e.g. 1 10 100")
+    parser.add_argument("--corpora", nargs="+", choices=sorted(CORPORA), default=sorted(CORPORA))
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=None, help="requests per concurrency level (default: one pass over the profiles)")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--json", help="write the full report (including rankings) here")
+    parser.add_argument("--baseline", help="compare against a report saved earlier with --json")
+    # Internal: a single measured run in a fresh interpreter
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    parser.add_argument("--cold-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    requests = args.requests or len(load_profiles(args.corpora))
+    if args.child:
+        result = run_child(args.db, args.corpora, args.top_n, args.threads, requests, args.cold_only)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    report = {
+        "python": sys.version.split()[0],
+        "corpora": args.corpora,
+        "top_n": args.top_n,
+        "scenarios": {},
+    }
+    for scale in args.scale:
+        print(f"[Benchmark] Running catalog scale {scale}x ...")
+        report["scenarios"][f"{scale}x"] = run_scenario(scale, args.corpora, args.top_n, args.threads, requests)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"\n[Benchmark] Report written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare_to_baseline(report, baseline) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.catalog import make_catalog
+from benchmarks.runner import BACKEND_DIR, CORPORA, load_profiles, percentiles
+
+# ──────────────────────────────────────────────
+# SHARDED SCORING SCALING
+# Scores the profile corpora on a scaled catalog in-process and with
+# 2, 4, ... shard worker processes (MOVIEFY_SHARDS), reporting batch
+# throughput, single-request latency and the speedup over in-process
+# scoring (MOVIEFY_SHARDS below 2 scores in-process, so that is the
+# baseline). Shards run in parallel only up to the number of cores, so
+# expect gains until then and none beyond.
+#   speedup      sharded throughput / in-process throughput
+#   identical    sharded rankings equal to the in-process ones
+#
+#     python -m benchmarks.sharding --scale 20 --shards 2 4 8
+# ──────────────────────────────────────────────
+
+
+def _measure(recommender, profiles, top_n, chunk_size, singles):
+    t = time.perf_counter()
+    batch = recommender.generate_recommendations_batch(profiles, top_n, chunk_size=chunk_size, use_cache=False)
+    throughput = len(profiles) / (time.perf_counter() - t)
+    latencies = []
+    for profile in profiles[:singles]:
+        t = time.perf_counter()
+        recommender.generate_recommendations(profile, top_n, use_cache=False)
+        latencies.append((time.perf_counter() - t) * 1000.0)
+    return [[rec["id"] for rec in recs] for recs in batch], throughput, percentiles(latencies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.sharding", description="Sharded scoring scaling.")
+    parser.add_argument("--scale", type=int, default=10, help="catalog copies (see benchmarks.catalog)")
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4], help="shard counts, 2 or more")
+    parser.add_argument("--corpora", nargs="+", choices=sorted(CORPORA), default=sorted(CORPORA))
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--singles", type=int, default=100, help="profiles timed one request at a time")
+    args = parser.parse_args(argv)
+    if min(args.shards) < 2:
+        parser.error("--shards counts must be 2 or more; fewer shards score in-process, the baseline")
+
+    with tempfile.TemporaryDirectory(prefix="moviefy-sharding-") as workdir:
+        db_path = make_catalog(os.path.join(BACKEND_DIR, "movies.db"), workdir, args.scale)
+        return _compare(db_path, args)
+
+
+def _compare(db_path, args):
+    sys.path.insert(0, BACKEND_DIR)
+    import recommender
+
+    recommender.DB_PATH = db_path
+    recommender.CATALOG_REFRESH_INTERVAL = None
+    recommender.SHARDS = 0
+    recommender.warm_cache()
+    snapshot = recommender.get_snapshot()
+    profiles = load_profiles(args.corpora)
+
+    print(f"\n── {len(profiles)} profiles, {snapshot.engine.size} movies, {os.cpu_count()} cores ──")
+    expected, base, latency = _measure(recommender, profiles, args.top_n, args.chunk_size, args.singles)
+    print(f"  in-process   {base:8.1f} profiles/s  single p50 {latency['p50']:7.2f} ms  p95 {latency['p95']:7.2f} ms")
+
+    for shards in args.shards:
+        recommender.SHARDS = shards
+        # Workers spawn and attach on the first request
+        t = time.perf_counter()
+        recommender.generate_recommendations(profiles[0], args.top_n, use_cache=False)
+        start_s = time.perf_counter() - t
+        rankings, throughput, latency = _measure(recommender, profiles, args.top_n, args.chunk_size, args.singles)
+        identical = sum(a == b for a, b in zip(expected, rankings))
+        print(
+            f"  shards={shards:<3d}   {throughput:8.1f} profiles/s  single p50 {latency['p50']:7.2f} ms  "
+            f"p95 {latency['p95']:7.2f} ms  speedup x{throughput / base:.2f}  "
+            f"identical {identical}/{len(profiles)}  (start {start_s:.2f}s)"
+        )
+        recommender.close_shards()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.catalog import make_catalog
+from benchmarks.runner import BACKEND_DIR, CORPORA, _spawn, load_profiles
+
+# ──────────────────────────────────────────────
+# STARTUP BENCHMARK
+# What a serverless cold start pays before the first response: importing
+# recommender, warming it and serving one request, each in a fresh
+# interpreter. Also reports which heavy libraries got imported, and how
+# long the pandas + scikit-learn imports the module used to do eagerly
+# take on their own, for comparison:
+#
+#     python -m benchmarks.startup --repeat 5
+# ──────────────────────────────────────────────
+
+HEAVY_MODULES = ("numpy", "scipy", "pandas", "sklearn")
+EAGER_IMPORTS = ("pandas", "sklearn.feature_extraction.text", "sklearn.metrics.pairwise")
+
+
+def run_child(db_path, retrieval):
+    """One cold start; every module import happens inside the timed region."""
+    profile = load_profiles(sorted(CORPORA))[0]
+    t0 = time.perf_counter()
+    if retrieval == "eager":
+        import importlib
+        for name in EAGER_IMPORTS:
+            importlib.import_module(name)
+        return {"import": time.perf_counter() - t0, "loaded": _loaded()}
+
+    sys.path.insert(0, BACKEND_DIR)
+    import recommender
+    t1 = time.perf_counter()
+    loaded_at_import = _loaded()
+
+    recommender.DB_PATH = db_path
+    recommender.RETRIEVAL_MODE = retrieval
+    recommender.CATALOG_REFRESH_INTERVAL = None
+    recommender.warm_cache()
+    t2 = time.perf_counter()
+    recommender.generate_recommendations(profile, use_cache=False)
+    t3 = time.perf_counter()
+    return {
+        "import": t1 - t0,
+        "warm": t2 - t1,
+        "first_request": t3 - t2,
+        "total": t3 - t0,
+        "loaded_at_import": loaded_at_import,
+        "loaded": _loaded(),
+    }
+
+
+def _loaded():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description="Cold start cost per retrieval mode.")
+    parser.add_argument("--modes", nargs="+", default=["sparse", "fts5"], choices=["sparse", "lsa", "fts5"])
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per mode (the median is reported)")
+    parser.add_argument("--json", help="write the raw runs here")
+    # Internal: a single cold start in a fresh interpreter
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--retrieval", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(run_child(args.db, args.retrieval), f)
+        return 0
+
+    report = {}
+    with tempfile.TemporaryDirectory(prefix="moviefy-startup-") as workdir:
+        db_path = make_catalog(os.path.join(BACKEND_DIR, "movies.db"), workdir)
+        # Publish the index artifact (and LSA embedding / FTS5 table) first,
+        # so the timed runs measure a worker attaching, not a first build
+        for mode in args.modes:
+            _spawn(["--db", db_path, "--retrieval", mode], module="benchmarks.startup")
+        for mode in ["eager"] + args.modes:
+            report[mode] = [
+                _spawn(["--db", db_path, "--retrieval", mode], module="benchmarks.startup")
+                for _ in range(max(args.repeat, 1))
+            ]
+
+    eager = report.pop("eager")
+    print(f"\n── Cold start, median of {len(eager)} fresh interpreters ──")
+    print(f"  eager pandas + sklearn imports alone   {statistics.median(r['import'] for r in eager) * 1000:8.1f} ms")
+    for mode, runs in report.items():
+        median = {name: statistics.median(r[name] for r in runs) * 1000 for name in ("import", "warm", "first_request", "total")}
+        print(
+            f"  {mode:6s}  import {median['import']:7.1f} ms  warm {median['warm']:7.1f} ms  "
+            f"first request {median['first_request']:6.1f} ms  total {median['total']:7.1f} ms"
+        )
+        print(f"          imported at import: {', '.join(runs[0]['loaded_at_import']) or '-'};"
+              f" after first request: {', '.join(runs[0]['loaded']) or '-'}")
+
+    if args.json:
+        report["eager"] = eager
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"\n[Benchmark] Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,14 @@ import sys
 sys.path.append(os.path.join(os.getcwd(), "backend"))
 
 if __name__ == "__main__":
+    workers = int(os.environ.get("MOVIEFY_WORKERS", "1"))
     print("--- MOVIEFY BACKEND ---")
     print("Starting local development server on http://localhost:8000")
     print("Make sure you have installed: pip install -r backend/requirements.txt")
-    uvicorn.run("backend.index:app", host="0.0.0.0", port=8000, reload=True)
+    if workers > 1:
+        # Fit the index once here; every worker memory-maps the same artifact
+        import recommender
+        recommender.build_index()
+        uvicorn.run("backend.index:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run("backend.index:app", host="0.0.0.0", port=8000, reload=True)
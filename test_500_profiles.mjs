@@ -365,6 +365,16 @@ PROFESSIONS.slice(0, 150).forEach(p => {
 
 console.log(`Total profiles: ${allProfiles.length}`);
 
+// `node test_500_profiles.mjs --export-profiles <file>` writes the parsed
+// profiles as a fixture for the Python benchmarks and stops here.
+const exportAt = process.argv.indexOf('--export-profiles');
+if (exportAt !== -1) {
+  const exported = allProfiles.map(p => ({ name: p.name, expected_industry: p.industry, ...parseResume(p.text) }));
+  fs.writeFileSync(process.argv[exportAt + 1], JSON.stringify(exported, null, 1), 'utf8');
+  console.log(`Exported ${exported.length} profiles to ${process.argv[exportAt + 1]}`);
+  process.exit(0);
+}
+
 // ──── Run Tests ────
 const rec = new Recommender();
 const results = [];
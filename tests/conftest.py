@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+# ──────────────────────────────────────────────
+# SHARED FIXTURES
+# The backend modules import each other flat, as when run_backend.py
+# starts the server from backend/. Tests that touch the recommender run
+# against a private copy of movies.db, so the tracked database and its
+# index artifacts are never written to.
+# ──────────────────────────────────────────────
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+MOVIES_DB = os.path.join(BACKEND_DIR, "movies.db")
+PROFILES = os.path.join(ROOT, "benchmarks", "fixtures", "profiles_500.json")
+
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def profiles():
+    with open(PROFILES, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def _indexed_catalog(tmp_path_factory):
+    """movies.db copy whose index artifact is fitted once per session."""
+    import recommender
+
+    path = str(tmp_path_factory.mktemp("catalog") / "movies.db")
+    shutil.copyfile(MOVIES_DB, path)
+    db_path, recommender.DB_PATH = recommender.DB_PATH, path
+    try:
+        recommender.build_index()
+    finally:
+        recommender.DB_PATH = db_path
+    return path
+
+
+@pytest.fixture
+def catalog(_indexed_catalog, tmp_path):
+    """Path of a writable movies.db (with its index artifact) for one test."""
+    path = str(tmp_path / "movies.db")
+    shutil.copyfile(_indexed_catalog, path)
+    source_index = os.path.join(os.path.dirname(_indexed_catalog), "movies_index")
+    shutil.copytree(source_index, str(tmp_path / "movies_index"), ignore=shutil.ignore_patterns("*.lock"))
+    return path
+
+
+@pytest.fixture
+def recommender(catalog, monkeypatch):
+    """The recommender module, cold, serving `catalog` without hot reloading."""
+    import recommender
+
+    monkeypatch.setattr(recommender, "DB_PATH", catalog)
+    monkeypatch.setattr(recommender, "CATALOG_REFRESH_INTERVAL", None)
+    monkeypatch.setattr(recommender, "RETRIEVAL_MODE", "sparse")
+    monkeypatch.setattr(recommender, "SHARDS", 0)
+    monkeypatch.setattr(recommender, "_snapshot", None)
+    monkeypatch.setattr(recommender, "_fts", None)
+    recommender._result_cache.clear()
+    recommender._ranking_cache.clear()
+    yield recommender
+    recommender.stop_catalog_refresher()
+    recommender.close_shards()
+    recommender._result_cache.clear()
+    recommender._ranking_cache.clear()
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from async_recommender import AsyncRecommender, NotReady, Overloaded
+
+
+def test_missing_catalog_fails_then_recovers(recommender, catalog, tmp_path, monkeypatch, profiles):
+    monkeypatch.setattr(recommender, "DB_PATH", str(tmp_path / "missing" / "movies.db"))
+
+    async def scenario():
+        service = AsyncRecommender(workers=2)
+        assert service.readiness()["state"] == "cold"
+        with pytest.raises(NotReady):
+            await service.recommend(profiles[0], 5)
+        assert service.readiness()["state"] == "failed"
+        assert not service.ready
+
+        recommender.DB_PATH = catalog
+        await service.start()
+        assert service.readiness()["state"] == "ready"
+        recs = await service.recommend(profiles[0], 5)
+        await service.close()
+        return recs
+
+    assert asyncio.run(scenario()) == recommender.generate_recommendations(profiles[0], 5)
+
+
+def test_identical_requests_coalesce_and_overload_sheds(recommender, profiles):
+    async def scenario():
+        service = AsyncRecommender(workers=2, max_pending=3)
+        service.start()
+        same = await asyncio.gather(*[service.recommend(profiles[0], 5, use_cache=False) for _ in range(5)])
+        distinct = await asyncio.gather(
+            *[service.recommend(p, 5, use_cache=False) for p in profiles[1:7]], return_exceptions=True
+        )
+        await service.close()
+        return same, distinct, service.stats()
+
+    same, distinct, stats = asyncio.run(scenario())
+    assert all(recs == same[0] for recs in same)
+    assert stats["coalesced"] == 4
+    assert sum(isinstance(r, Overloaded) for r in distinct) == 3
+    assert stats["pending"] == 0 and stats["in_flight"] == 0
+
+
+def test_close_leaves_shard_workers_to_the_app(recommender, profiles, monkeypatch):
+    monkeypatch.setattr(recommender, "SHARDS", 2)
+
+    async def scenario():
+        service = AsyncRecommender(workers=1)
+        recs = await service.recommend(profiles[0], 5)
+        pool = recommender._shards[1]
+        await service.close()
+        return recs, pool
+
+    recs, pool = asyncio.run(scenario())
+    assert pool is not None
+    assert recommender._get_shards(recommender.get_snapshot()) is pool
+    assert recommender.generate_recommendations(profiles[0], 5, use_cache=False) == recs
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+# Every title in movies.db scores 5; "Technology" matches under a hundred of them
+FILTERS = {"industries": ["Technology"], "min_educational_value_score": 5, "content_type": "Movie"}
+
+
+def _allowed_ids(path, filters, exclude=()):
+    from scoring_engine import mentions_series
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT id, title, summary, industry, educational_value_score FROM movies").fetchall()
+    conn.close()
+    names = [name.lower() for name in filters["industries"]]
+    return {
+        movie_id for movie_id, title, summary, industry, edu in rows
+        if any(name in industry.lower() for name in names)
+        and min(5 if edu is None else edu, 10) >= filters["min_educational_value_score"]
+        and mentions_series(title, summary) == (filters["content_type"] == "Web Series")
+        and movie_id not in exclude
+    }
+
+
+@pytest.mark.parametrize("retrieval", ["sparse", "fts5"])
+def test_filtered_results_are_allowed_and_full(recommender, catalog, profiles, monkeypatch, retrieval):
+    # Few bm25 candidates, so filtering after the search would come up short
+    monkeypatch.setattr(recommender, "FTS_CANDIDATES", 20)
+    profile = next(p for p in profiles if p["industry"] != "Technology")
+    unfiltered = recommender.generate_recommendations(profile, 10, use_cache=False, retrieval=retrieval)
+    exclude = [rec["id"] for rec in unfiltered[:3]]
+    filters = dict(FILTERS, exclude_ids=exclude)
+    allowed = _allowed_ids(catalog, filters, exclude)
+
+    recs = recommender.generate_recommendations(profile, 10, use_cache=False, retrieval=retrieval, filters=filters)
+    assert len(recs) == 10
+    assert {rec["id"] for rec in recs} <= allowed
+
+    strict = dict(filters, min_educational_value_score=6)
+    assert recommender.generate_recommendations(profile, 10, use_cache=False, retrieval=retrieval, filters=strict) == []
+
+
+@pytest.mark.parametrize("filters", [
+    {"min_educational_value_score": "high"},
+    {"min_educational_value_score": float("nan")},
+    {"exclude_ids": ["abc"]},
+    {"industries": [1]},
+    {"industries": 5},
+    {"content_type": "Documentary"},
+    {"genre": "Drama"},
+])
+def test_bad_filters_raise_value_error(recommender, profiles, filters):
+    with pytest.raises(ValueError):
+        recommender.generate_recommendations(profiles[0], 10, filters=filters)
+
+
+def test_numeric_strings_match_numbers(recommender, profiles):
+    as_number = recommender.generate_recommendations(profiles[0], 10, filters={"min_educational_value_score": 7})
+    as_string = recommender.generate_recommendations(profiles[0], 10, filters={"min_educational_value_score": "7"})
+    assert as_string == as_number
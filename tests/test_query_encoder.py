@@ -0,0 +1,19 @@
+import numpy as np
+
+
+def test_encoder_matches_tfidf_vectorizer(recommender, profiles):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    recommender.warm_cache()
+    encoder = recommender.get_snapshot().vectorizer
+    reference = TfidfVectorizer(**recommender.TFIDF_PARAMS).fit(
+        recommender._catalog_docs(*recommender._read_catalog())[1]
+    )
+    parsed = [recommender._parse_profile(p) for p in profiles]
+    parsed = [p for p in parsed if p["query"].strip()]
+    assert parsed
+    for p in parsed:
+        expected = reference.transform([p["query"]])
+        for indices, data in (encoder.encode(p["query"]), encoder.encode_parts(p["query_parts"])):
+            np.testing.assert_array_equal(indices, expected.indices)
+            assert data.tobytes() == expected.data.tobytes()
@@ -0,0 +1,26 @@
+import os
+import signal
+import time
+
+
+def _kill_worker(pool, shard):
+    for pid in list(pool._executors[shard]._processes):
+        os.kill(pid, signal.SIGKILL)
+
+
+def test_dead_shard_worker_is_replaced(recommender, profiles, monkeypatch):
+    expected = [recommender.generate_recommendations(p, 10, use_cache=False) for p in profiles[:3]]
+
+    monkeypatch.setattr(recommender, "SHARDS", 2)
+    pool = recommender._get_shards(recommender.get_snapshot())
+    assert recommender.generate_recommendations(profiles[0], 10, use_cache=False) == expected[0]
+
+    # Killed between requests: noticed mid-request or already marked broken
+    _kill_worker(pool, 0)
+    assert recommender.generate_recommendations(profiles[1], 10, use_cache=False) == expected[1]
+    _kill_worker(pool, 1)
+    time.sleep(0.5)
+    assert recommender.generate_recommendations(profiles[2], 10, use_cache=False) == expected[2]
+
+    assert pool.respawns == 2
+    assert recommender._get_shards(recommender.get_snapshot()) is pool
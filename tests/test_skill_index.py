@@ -0,0 +1,69 @@
+import random
+import sqlite3
+
+import numpy as np
+import pytest
+
+from conftest import MOVIES_DB
+from scoring_engine import FactorizedColumn, SkillIndex
+
+
+@pytest.fixture(scope="module")
+def career_skills():
+    conn = sqlite3.connect(MOVIES_DB)
+    values = ["" if v is None else v for (v,) in conn.execute("SELECT career_skills FROM movies")]
+    conn.close()
+    return values
+
+
+@pytest.fixture(scope="module")
+def index(career_skills):
+    return SkillIndex(FactorizedColumn.from_values(career_skills))
+
+
+def _needles(career_skills, count=400, seed=7):
+    """Empty, comma-only and unknown needles plus random substrings of
+    real career_skills values, many of them spanning a segment boundary."""
+    rng = random.Random(seed)
+    lowered = [s.lower() for s in career_skills]
+    needles = ["", ",", ", ", " ", "no such skill", "python"]
+    for _ in range(count):
+        value = rng.choice(lowered)
+        if not value:
+            continue
+        start = rng.randrange(len(value))
+        needles.append(value[start:start + rng.randint(1, 40)])
+    for _ in range(count // 4):
+        # Straddle a comma on purpose
+        value = rng.choice([v for v in lowered if "," in v])
+        comma = rng.choice([i for i, c in enumerate(value) if c == ","])
+        needles.append(value[max(comma - rng.randint(1, 12), 0):comma + rng.randint(1, 12)])
+    return needles
+
+
+def _substring_rows(career_skills, needle):
+    return np.flatnonzero([needle in s.lower() for s in career_skills])
+
+
+def test_posting_matches_substring_semantics(career_skills, index):
+    for needle in _needles(career_skills):
+        np.testing.assert_array_equal(index.posting(needle), _substring_rows(career_skills, needle), err_msg=repr(needle))
+
+
+def test_overlap_counts_match_substring_semantics(career_skills, index):
+    rng = random.Random(11)
+    needles = _needles(career_skills, count=100, seed=3)
+    for _ in range(50):
+        skills = rng.sample(needles, rng.randint(0, 8))
+        expected = np.zeros(len(career_skills), dtype=np.int64)
+        for skill in skills:
+            expected[_substring_rows(career_skills, skill)] += 1
+        np.testing.assert_array_equal(index.overlap_counts(skills), expected)
+        np.testing.assert_array_equal(index.candidates(skills), np.flatnonzero(expected))
+
+
+def test_pruned_recommendations_match_unpruned(recommender, profiles):
+    for profile in profiles[:150]:
+        full = recommender.generate_recommendations(profile, 20, use_cache=False, prune_candidates=False)
+        pruned = recommender.generate_recommendations(profile, 20, use_cache=False, prune_candidates=True)
+        assert pruned == full, profile["name"]
@@ -0,0 +1,126 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+# Mean top-10 overlap an incrementally patched index must keep with a full refit
+RANKING_TOLERANCE = 0.9
+
+
+def _same_matrix(a, b):
+    return a.shape == b.shape and (a != b).nnz == 0
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    """(ids, docs, fresh TfidfIndex) of the tracked catalog."""
+    import recommender
+    from conftest import MOVIES_DB
+    from tfidf_index import TfidfIndex
+
+    db_path, recommender.DB_PATH = recommender.DB_PATH, MOVIES_DB
+    try:
+        ids, docs = recommender._catalog_docs(*recommender._read_catalog())
+    finally:
+        recommender.DB_PATH = db_path
+    return ids, docs, TfidfIndex.fit(recommender.TFIDF_PARAMS, ids, docs)
+
+
+@pytest.mark.parametrize("sublinear_tf", [True, False])
+def test_fit_matches_tfidf_vectorizer(fitted, sublinear_tf):
+    import recommender
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from tfidf_index import TfidfIndex
+
+    ids, docs, _ = fitted
+    params = dict(recommender.TFIDF_PARAMS, sublinear_tf=sublinear_tf)
+    expected = TfidfVectorizer(**params).fit_transform(docs)
+    matrix = TfidfIndex.fit(params, ids, docs).matrix
+    # Compare the raw buffers: scipy's != would sort indices in place
+    np.testing.assert_array_equal(matrix.indptr, expected.indptr)
+    np.testing.assert_array_equal(matrix.indices, expected.indices)
+    assert matrix.data.tobytes() == expected.data.tobytes()
+
+
+def test_unchanged_update_reproduces_fit(fitted):
+    ids, docs, index = fitted
+    rows = np.arange(0, len(ids), 97)
+    patched = index.update(ids[rows], [docs[i] for i in rows])
+    np.testing.assert_array_equal(patched.ids, index.ids)
+    np.testing.assert_array_equal(patched.idf, index.idf)
+    assert _same_matrix(patched.matrix, index.matrix)
+
+
+def test_delete_and_readd_reproduces_fit(fitted):
+    ids, docs, index = fitted
+    rows = np.arange(5, len(ids), 131)
+    patched = index.delete(ids[rows]).add(ids[rows], [docs[i] for i in rows])
+    # Re-added rows are appended; put them back in fit order by id
+    order = np.argsort(patched.ids)[np.searchsorted(np.sort(patched.ids), ids)]
+    np.testing.assert_array_equal(patched.ids[order], ids)
+    np.testing.assert_array_equal(patched.idf, index.idf)
+    assert _same_matrix(patched.matrix[order], index.matrix)
+    assert index.sync(ids, docs) is index
+
+
+def _edit_catalog(path):
+    """Append, edit and delete a handful of movies the way an admin would."""
+    conn = sqlite3.connect(path)
+    columns = "title, career_skills, industry, career_stage, summary, educational_value_score"
+    conn.execute(
+        f"INSERT INTO movies ({columns}) SELECT title || ' II', career_skills || ', Quantum Negotiation', "
+        f"industry, career_stage, summary || ' A sequel about zeppelin logistics and quantum negotiation.', "
+        f"educational_value_score FROM movies WHERE id % 400 = 1"
+    )
+    conn.execute(
+        "UPDATE movies SET summary = summary || ' Now recut with a documentary epilogue.' WHERE id % 500 = 7"
+    )
+    conn.execute("DELETE FROM movies WHERE id % 600 = 3")
+    conn.commit()
+    conn.close()
+
+
+def _rankings(recommender, profiles):
+    return [[rec["id"] for rec in recommender.generate_recommendations(p, 10, use_cache=False)] for p in profiles]
+
+
+def test_incremental_update_matches_refit(recommender, catalog, profiles):
+    profiles = profiles[:120]
+    recommender.warm_cache()
+    fitted = recommender.get_snapshot()
+    # Warm-up and reloads build the neighbor table, not the first request
+    assert fitted.neighbors.peek(recommender.NEIGHBOR_K) is not None
+    _edit_catalog(catalog)
+
+    assert recommender.refresh_catalog()
+    patched = recommender.get_snapshot()
+    assert patched.source == "incremental update"
+    assert patched.neighbors.peek(recommender.NEIGHBOR_K) is not None
+    assert patched.tfidf.drift <= recommender.REFIT_DRIFT_THRESHOLD
+    # Published under its own lineage, never under the table's content hash
+    assert patched.key == recommender._patched_key(patched.content_hash, fitted.key)
+    patched_rankings = _rankings(recommender, profiles)
+
+    assert recommender.refresh_catalog(force=True)
+    refit = recommender.get_snapshot()
+    assert refit.source == "fresh fit"
+    assert refit.key == refit.content_hash == patched.content_hash
+    refit_rankings = _rankings(recommender, profiles)
+
+    overlap = np.mean([len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(patched_rankings, refit_rankings)])
+    assert overlap >= RANKING_TOLERANCE
+
+    # force refits even when an artifact for the table already exists
+    recommender.refresh_catalog(force=True)
+    assert recommender.get_snapshot().source == "fresh fit"
+
+
+def test_cold_start_ignores_patched_artifact(recommender, catalog):
+    recommender.warm_cache()
+    _edit_catalog(catalog)
+    recommender.refresh_catalog()
+    patched = recommender.get_snapshot()
+
+    cold = recommender._build_or_load(*recommender._read_catalog())
+    assert cold.key == patched.content_hash
+    assert cold.source == "fresh fit"